@@ -1,6 +1,42 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Per-connection SQLite tuning: WAL lets API reads (history, summaries,
+    reports) proceed while an upload is writing, synchronous=NORMAL is safe
+    under WAL, and a 20 MB page cache keeps repeated summary reads in memory.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-20000')
+        cursor.execute('PRAGMA temp_store=MEMORY')
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite, dispatch_uid='api.configure_sqlite')
+
+        # Warm Matplotlib once per process so the first upload does not pay
+        # for building the font cache and the first Agg text render.
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            from matplotlib import font_manager
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            font_manager.fontManager
+            fig = Figure(figsize=(1, 1), dpi=50)
+            FigureCanvasAgg(fig)
+            fig.text(0.5, 0.5, '0')
+            fig.canvas.draw()
+        except Exception:
+            pass
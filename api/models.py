@@ -1,10 +1,19 @@
 # api/models.py
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
-from django.db import models
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.db.models.signals import post_delete, pre_save
 import os
 
+# Chart types pre-rendered per dataset; also the only names allowed in chart storage paths
+CHART_TYPES = ('bar', 'pie', 'line', 'hist')
+
+# Storage cleanup for deleted records runs here, off the request thread
+file_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-cleanup')
+
 
 class UploadedDataset(models.Model):
     """
@@ -51,26 +60,140 @@ class UploadedDataset(models.Model):
             # Fall back to the storage name (relative path in storage)
             return self.csv_file.name if self.csv_file else None
 
+    @property
+    def chart_dir(self):
+        """Storage directory holding the chart PNGs pre-rendered at upload time."""
+        return f"charts/{self.pk}"
+
+    def chart_image_name(self, chart_type):
+        """
+        Storage name of the pre-rendered PNG for ``chart_type``.
+        Raises ValueError for anything outside CHART_TYPES, so request input
+        can never point the name at another dataset's files.
+        """
+        if chart_type not in CHART_TYPES:
+            raise ValueError(f"Unknown chart type: {chart_type!r}")
+        return f"{self.chart_dir}/{chart_type}.png"
+
+
+def report_storage():
+    """
+    Storage for background-generated reports. It has no base_url: the files are
+    only handed out by ReportStatusView after an ownership check.
+    """
+    return FileSystemStorage(location=settings.REPORT_FILES_ROOT)
+
+
+class ReportJob(models.Model):
+    """
+    A PDF report built by a background worker (ReportView / ReportFromSummaryView
+    with ?async=1). Kept in the database so any server process can answer the
+    status poll.
+
+    Fields:
+      - id: uuid4 hex handed to the client as job_id
+      - user: who started the job; only they can see it or download the file
+      - dataset: the stored dataset the report is about (None for ad-hoc reports);
+        deleting the dataset deletes its jobs and their files
+      - state: pending / done / failed
+      - file: the finished PDF, named after the job id
+      - filename: name the PDF is downloaded as
+      - created_at: jobs older than REPORT_JOB_TIMEOUT are pruned with their files
+    """
+    STATE_PENDING = 'pending'
+    STATE_DONE = 'done'
+    STATE_FAILED = 'failed'
+    STATE_CHOICES = [
+        (STATE_PENDING, 'Pending'),
+        (STATE_DONE, 'Done'),
+        (STATE_FAILED, 'Failed'),
+    ]
+
+    id = models.CharField(primary_key=True, max_length=32, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    dataset = models.ForeignKey(
+        UploadedDataset,
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+        null=True,
+        blank=True
+    )
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_PENDING)
+    file = models.FileField(storage=report_storage, blank=True)
+    filename = models.CharField(max_length=255, default='report.pdf')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.pk} ({self.state})"
+
 
 # -------------------------
 # File cleanup signals
 # -------------------------
 # When a model instance is deleted, remove the file from storage as well.
+def _delete_stored_files(csv_name, chart_dir):
+    """
+    Remove a deleted record's CSV and its pre-rendered chart PNGs from storage.
+    """
+    try:
+        if csv_name:
+            default_storage.delete(csv_name)
+    except Exception:
+        # never raise here; log in production if desired
+        pass
+
+    # remove the chart PNGs rendered for this record at upload time
+    try:
+        _dirs, files = default_storage.listdir(chart_dir)
+        for name in files:
+            default_storage.delete(f"{chart_dir}/{name}")
+    except Exception:
+        pass
+
+
 @receiver(post_delete, sender=UploadedDataset)
 def delete_file_on_record_delete(sender, instance, **kwargs):
     """
-    Delete the underlying file when the UploadedDataset record is deleted.
+    Delete the underlying files when the UploadedDataset record is deleted.
+    The storage calls are queued once the delete commits, so bulk deletes
+    (e.g. pruning old uploads) do not wait on filesystem I/O.
     """
-    file = instance.csv_file
+    csv_name = instance.csv_file.name if instance.csv_file else None
+    chart_dir = instance.chart_dir
+    transaction.on_commit(
+        lambda: file_cleanup_executor.submit(_delete_stored_files, csv_name, chart_dir)
+    )
+
+
+def _delete_report_file(storage, name):
+    """Remove a deleted ReportJob's PDF; never raises."""
     try:
-        if file and file.name:
-            # file.delete() will remove from storage
-            file.delete(save=False)
+        storage.delete(name)
     except Exception:
-        # never raise here; log in production if desired
         pass
 
 
+@receiver(post_delete, sender=ReportJob)
+def delete_report_on_job_delete(sender, instance, **kwargs):
+    """
+    Delete the job's PDF along with the record, whether the job expired or was
+    removed together with its dataset or user (cascade).
+    """
+    if not instance.file:
+        return
+    storage, name = instance.file.storage, instance.file.name
+    transaction.on_commit(
+        lambda: file_cleanup_executor.submit(_delete_report_file, storage, name)
+    )
+
+
 # If a new file is uploaded to replace the old one, delete the old file
 @receiver(pre_save, sender=UploadedDataset)
 def delete_file_on_change(sender, instance, **kwargs):
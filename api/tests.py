@@ -1,3 +1,480 @@
-from django.test import TestCase
+import io
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.test import override_settings
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+import pandas as pd
+
+from . import views
+from .models import ReportJob, UploadedDataset, file_cleanup_executor
+
+
+SUMMARY = {
+    'total_count': 4,
+    'averages': {'Flowrate': 2.5, 'Pressure': 1.0, 'Temperature': 101.5},
+    'type_distribution': {'Pump': 2, 'Valve': 2},
+    'per_type_averages': {
+        'Flowrate': {'Pump': 2.0, 'Valve': 3.0},
+        'Pressure': {'Pump': 0.5, 'Valve': 1.5},
+        'Temperature': {'Pump': 101.0, 'Valve': 102.0},
+    },
+    'preview_rows': [
+        {'Equipment Name': f'E{i}', 'Type': 'Pump' if i % 2 else 'Valve',
+         'Flowrate': i, 'Pressure': i / 2, 'Temperature': 100 + i}
+        for i in range(4)
+    ],
+}
+
+
+class TempMediaMixin:
+    """Point MEDIA_ROOT at a temporary directory for the duration of each test."""
+
+    def use_temp_media(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class ReportJobTests(TempMediaMixin, APITestCase):
+    """
+    Background report jobs (?async=1) and /api/report-status/<job_id>/.
+    Jobs run inline instead of on report_executor, and both MEDIA_ROOT and the
+    report storage point at temporary directories.
+    """
+
+    def setUp(self):
+        self.use_temp_media()
+        self.report_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_root, ignore_errors=True)
+
+        storage = mock.patch.object(
+            ReportJob._meta.get_field('file'), 'storage',
+            FileSystemStorage(location=self.report_root)
+        )
+        storage.start()
+        self.addCleanup(storage.stop)
+
+        inline = mock.patch.object(
+            views.report_executor, 'submit', side_effect=lambda fn, *args: fn(*args)
+        )
+        inline.start()
+        self.addCleanup(inline.stop)
+
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+        self.dataset = UploadedDataset.objects.create(
+            user=self.owner,
+            original_filename='plant.csv',
+            csv_file='uploads/plant.csv',
+            summary=SUMMARY
+        )
+        self.client.force_authenticate(self.owner)
+
+    def start_dataset_job(self):
+        response = self.client.get(f'/api/report/{self.dataset.pk}/', {'async': '1'})
+        self.assertEqual(response.status_code, 202)
+        return response.data['job_id']
+
+    def status_url(self, job_id):
+        return f'/api/report-status/{job_id}/'
+
+    def client_for(self, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def test_dataset_report_job_runs_and_downloads(self):
+        job_id = self.start_dataset_job()
+
+        response = self.client.get(self.status_url(job_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], ReportJob.STATE_DONE)
+        self.assertTrue(response.data['url'].endswith(f'{self.status_url(job_id)}?download=1'))
+
+        download = self.client.get(self.status_url(job_id), {'download': '1'})
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('report_dataset_', download['Content-Disposition'])
+        self.assertEqual(b''.join(download.streaming_content)[:5], b'%PDF-')
+
+    def test_summary_report_job_runs_and_downloads(self):
+        response = self.client.post(
+            '/api/report-from-summary/?async=1',
+            {'summary': SUMMARY, 'filename': 'adhoc.pdf'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+
+        job = ReportJob.objects.get(pk=job_id)
+        self.assertEqual(job.state, ReportJob.STATE_DONE)
+        self.assertIsNone(job.dataset)
+
+        download = self.client.get(self.status_url(job_id), {'download': '1'})
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('adhoc.pdf', download['Content-Disposition'])
+
+    def test_report_file_is_stored_outside_media(self):
+        job = ReportJob.objects.get(pk=self.start_dataset_job())
+        self.assertEqual(job.file.name, f'{job.pk}.pdf')
+        self.assertTrue(job.file.path.startswith(self.report_root))
+        self.assertFalse(job.file.path.startswith(self.media_root))
+
+    def test_other_user_cannot_see_or_download_job(self):
+        job_id = self.start_dataset_job()
+        other = self.client_for(self.other)
+
+        self.assertEqual(other.get(self.status_url(job_id)).status_code, 404)
+        self.assertEqual(
+            other.get(self.status_url(job_id), {'download': '1'}).status_code, 404
+        )
+
+    def test_anonymous_requests_are_rejected(self):
+        job_id = self.start_dataset_job()
+        anon = self.client_for(None)
+
+        self.assertEqual(anon.get(self.status_url(job_id)).status_code, 401)
+        self.assertEqual(
+            anon.get(self.status_url(job_id), {'download': '1'}).status_code, 401
+        )
+        self.assertEqual(
+            anon.get(f'/api/report/{self.dataset.pk}/', {'async': '1'}).status_code, 401
+        )
+
+    def test_other_users_dataset_cannot_be_queued(self):
+        response = self.client_for(self.other).get(
+            f'/api/report/{self.dataset.pk}/', {'async': '1'}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ReportJob.objects.exists())
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get(self.status_url('0' * 32)).status_code, 404)
+
+    def test_pending_job_cannot_be_downloaded(self):
+        job = ReportJob.objects.create(id='a' * 32, user=self.owner)
+
+        self.assertEqual(self.client.get(self.status_url(job.pk)).data['state'], 'pending')
+        response = self.client.get(self.status_url(job.pk), {'download': '1'})
+        self.assertEqual(response.status_code, 409)
+
+    def test_failed_job_reports_failure(self):
+        with mock.patch.object(views, 'build_dataset_report', side_effect=RuntimeError), \
+                self.assertLogs('api.views', 'ERROR'):
+            job_id = self.start_dataset_job()
+
+        response = self.client.get(self.status_url(job_id))
+        self.assertEqual(response.data['state'], ReportJob.STATE_FAILED)
+        self.assertNotIn('url', response.data)
+
+    def test_expired_job_is_404_and_pruned(self):
+        job_id = self.start_dataset_job()
+        ReportJob.objects.filter(pk=job_id).update(
+            created_at=timezone.now() - timedelta(seconds=views.REPORT_JOB_TIMEOUT + 1)
+        )
+        self.assertEqual(self.client.get(self.status_url(job_id)).status_code, 404)
+
+        self.start_dataset_job()
+        self.assertFalse(ReportJob.objects.filter(pk=job_id).exists())
+
+    def test_deleting_dataset_deletes_its_jobs(self):
+        job_id = self.start_dataset_job()
+        self.dataset.delete()
+        self.assertFalse(ReportJob.objects.filter(pk=job_id).exists())
+
+
+class ChartTypeTests(TempMediaMixin, APITestCase):
+    """chart_type comes from the query string and must never reach storage paths as-is."""
+
+    def setUp(self):
+        self.use_temp_media()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+        self.dataset = UploadedDataset.objects.create(
+            user=self.owner, original_filename='mine.csv',
+            csv_file='uploads/mine.csv', summary=SUMMARY
+        )
+        self.foreign = UploadedDataset.objects.create(
+            user=self.other, original_filename='theirs.csv',
+            csv_file='uploads/theirs.csv', summary=SUMMARY
+        )
+        default_storage.save(self.foreign.chart_image_name('bar'), ContentFile(b'their chart'))
+        self.traversal = f'../{self.foreign.pk}/bar'
+        self.client.force_authenticate(self.owner)
+
+    def test_chart_image_name_rejects_unknown_types(self):
+        with self.assertRaises(ValueError):
+            self.dataset.chart_image_name(self.traversal)
+
+    def test_cached_chart_png_ignores_unknown_types(self):
+        self.assertIsNone(views.cached_chart_png(self.dataset, SUMMARY, self.traversal))
+
+    def test_report_does_not_read_other_datasets_charts(self):
+        opened = []
+        real_open = default_storage.open
+
+        def spy(name, *args, **kwargs):
+            opened.append(name)
+            return real_open(name, *args, **kwargs)
+
+        with mock.patch.object(default_storage, 'open', side_effect=spy):
+            response = self.client.get(
+                f'/api/report/{self.dataset.pk}/', {'chart_type': self.traversal}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(opened, [self.dataset.chart_image_name('bar')])
+
+        bar = self.client.get(f'/api/report/{self.dataset.pk}/', {'chart_type': 'bar'})
+        self.assertEqual(response['ETag'], bar['ETag'])
+
+
+class ChartLifecycleTests(TempMediaMixin, APITestCase):
+    """Chart PNGs are rendered at upload, served from storage, and removed with the dataset."""
+
+    def setUp(self):
+        self.use_temp_media()
+        self.client.force_authenticate(User.objects.create_user('owner', password='pw'))
+
+    def upload(self):
+        text = make_csv([
+            ('P1', 10.5, 1.2, 100, 'Pump'),
+            ('P2', 12.0, 1.8, 110, 'Pump'),
+            ('V1', 4.25, 0.6, 95, 'Valve'),
+        ])
+        response = self.client.post(
+            '/api/upload/',
+            {'file': SimpleUploadedFile('plant.csv', text.encode('utf-8'), 'text/csv')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        return UploadedDataset.objects.get(pk=response.data['id'])
+
+    def test_chart_files_follow_the_dataset(self):
+        obj = self.upload()
+        chart_dir = obj.chart_dir
+        names = [obj.chart_image_name(chart_type) for chart_type in views.CHART_TYPES]
+        for name in names:
+            self.assertTrue(default_storage.exists(name), name)
+
+        # served straight from storage, without rendering again
+        with default_storage.open(obj.chart_image_name('pie'), mode='rb') as fh:
+            stored = fh.read()
+        with mock.patch.object(views, 'create_chart_image') as render:
+            self.assertEqual(views.cached_chart_png(obj, obj.summary, 'pie'), stored)
+        render.assert_not_called()
+
+        # the cleanup is queued on commit and runs on file_cleanup_executor
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.delete()
+        file_cleanup_executor.submit(lambda: None).result()
+        for name in names:
+            self.assertFalse(default_storage.exists(name), name)
+        self.assertEqual(default_storage.listdir(chart_dir)[1], [])
+
+
+class ReportCachingTests(TempMediaMixin, APITestCase):
+    """Conditional GET on /api/report/<pk>/ (ETag / Last-Modified)."""
+
+    def setUp(self):
+        self.use_temp_media()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.dataset = UploadedDataset.objects.create(
+            user=self.owner, original_filename='plant.csv',
+            csv_file='uploads/plant.csv', summary=SUMMARY
+        )
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/report/{self.dataset.pk}/'
+
+    def assertPrivate(self, response):
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_full_and_not_modified_responses_are_private(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertPrivate(first)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertPrivate(again)
+
+    def test_etag_changes_with_report_format_version(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch.object(views, 'REPORT_FORMAT_VERSION', views.REPORT_FORMAT_VERSION + 1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Flowrate', 'Pressure', 'Temperature', 'Type']
+
+
+def make_csv(rows, header=REQUIRED_COLUMNS):
+    """CSV text for ``rows`` (sequences of cell values; None -> empty cell)."""
+    lines = [','.join(header)]
+    lines += [','.join('' if v is None else str(v) for v in row) for row in rows]
+    return '\n'.join(lines) + '\n'
+
+
+# Stored averages are rounded to 2 decimals; each must be a correct rounding of
+# the float64 mean, up to float noise (chunked sums and pandas' mean() can land on
+# opposite sides of an exact .xx5 tie)
+AVERAGE_TOLERANCE = 0.005 + 1e-9
+
+
+def baseline_summary(text):
+    """
+    The summary as the original whole-file pandas code computed it
+    (value_counts / mean / groupby().mean()), before rounding.
+    """
+    df = pd.read_csv(io.StringIO(text))
+    df.columns = [str(c).strip() for c in df.columns]
+    for col in views.NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return {
+        'total_count': int(df.shape[0]),
+        'averages': {
+            col: (float(df[col].mean()) if not df[col].dropna().empty else None)
+            for col in views.NUMERIC_COLS
+        },
+        'type_distribution': {str(k): int(v) for k, v in df['Type'].value_counts().items()},
+        'per_type_averages': {
+            col: {
+                str(k): (float(v) if not pd.isna(v) else None)
+                for k, v in df.groupby('Type')[col].mean().items()
+            }
+            for col in views.NUMERIC_COLS
+        },
+    }
+
+
+class UploadSummaryTests(SimpleTestCase):
+    """summarize_csv (streamed, chunked) against the original pandas computation."""
+
+    def summarize(self, text):
+        # resolve raw header names the way UploadCSVView does
+        raw = {h.strip(): h for h in text.splitlines()[0].split(',')}
+        return views.summarize_csv(
+            io.BytesIO(text.encode('utf-8')),
+            [raw[c] for c in REQUIRED_COLUMNS],
+            category_columns=[raw['Type']]
+        )
+
+    def assertAveragesMatch(self, got, expected):
+        self.assertEqual(set(got), set(expected))
+        for key, value in expected.items():
+            if value is None:
+                self.assertIsNone(got[key], key)
+            else:
+                self.assertAlmostEqual(got[key], value, delta=AVERAGE_TOLERANCE, msg=key)
+
+    def assertMatchesBaseline(self, text):
+        summary = self.summarize(text)
+        expected = baseline_summary(text)
+        self.assertEqual(summary['total_count'], expected['total_count'])
+        self.assertEqual(summary['type_distribution'], expected['type_distribution'])
+        self.assertAveragesMatch(summary['averages'], expected['averages'])
+        self.assertEqual(set(summary['per_type_averages']), set(expected['per_type_averages']))
+        for col, per_type in expected['per_type_averages'].items():
+            self.assertAveragesMatch(summary['per_type_averages'][col], per_type)
+        return summary
+
+    def sample_rows(self, n, seed=0, types=('Pump', 'Valve', 'Reactor', 'Compressor')):
+        rng = random.Random(seed)
+        return [
+            (f'E{i}', round(rng.uniform(50, 250), 2),
+             None if i % 7 == 0 else round(rng.uniform(1, 10), 3),
+             round(rng.uniform(80, 400), 1), rng.choice(types))
+            for i in range(n)
+        ]
+
+    def chunk_count(self, text, **kwargs):
+        raw = {h.strip(): h for h in text.splitlines()[0].split(',')}
+        return sum(1 for _ in views.iter_csv_chunks(
+            io.BytesIO(text.encode('utf-8')), [raw[c] for c in REQUIRED_COLUMNS],
+            category_columns=[raw['Type']], **kwargs
+        ))
+
+    def test_small_csv(self):
+        summary = self.assertMatchesBaseline(make_csv([
+            ('P1', 10, 2.5, 100, 'Pump'),
+            ('P2', 20, 3.5, 110, 'Pump'),
+            ('V1', 5, 1.0, 90, 'Valve'),
+        ]))
+        self.assertEqual(summary['total_count'], 3)
+        self.assertEqual(list(summary['type_distribution']), ['Pump', 'Valve'])
+
+    def test_whitespace_headers(self):
+        header = [' Equipment Name', 'Flowrate ', ' Pressure', 'Temperature', ' Type ']
+        self.assertMatchesBaseline(make_csv(self.sample_rows(50), header=header))
+
+    @mock.patch.object(views, 'CSV_CHUNK_BYTES', 4096)
+    def test_multi_chunk_csv_with_pyarrow(self):
+        text = make_csv(self.sample_rows(2000, seed=1))
+        self.assertGreater(self.chunk_count(text), 1)
+        self.assertMatchesBaseline(text)
+
+    @mock.patch.object(views, 'CSV_CHUNK_ROWS', 300)
+    def test_multi_chunk_csv_with_pandas(self):
+        text = make_csv(self.sample_rows(2000, seed=2))
+        self.assertGreater(self.chunk_count(text, use_arrow=False), 1)
+        with mock.patch.object(views, 'pacsv', None):
+            self.assertMatchesBaseline(text)
+
+    @mock.patch.object(views, 'CSV_CHUNK_BYTES', 4096)
+    def test_missing_and_empty_types(self):
+        rows = self.sample_rows(1500, seed=3)
+        rows = [row if i % 5 else row[:4] + (None,) for i, row in enumerate(rows)]
+        summary = self.assertMatchesBaseline(make_csv(rows))
+        self.assertEqual(summary['total_count'], 1500)
+        self.assertEqual(sum(summary['type_distribution'].values()), 1200)
+
+    @mock.patch.object(views, 'CSV_CHUNK_BYTES', 4096)
+    def test_numeric_column_empty_in_first_block_falls_back_to_pandas(self):
+        rows = [row[:2] + (None,) + row[3:] if i < 600 else row
+                for i, row in enumerate(self.sample_rows(1500, seed=4))]
+        text = make_csv(rows)
+        with self.assertLogs('api.views', 'WARNING') as logs:
+            self.assertMatchesBaseline(text)
+        self.assertIn('falling back to pandas', logs.output[0])
+
+    def test_large_magnitudes_keep_two_decimals(self):
+        rng = random.Random(5)
+        rows = [
+            (f'E{i}', round(rng.uniform(1e6, 9e6), 3), round(rng.uniform(1e5, 5e6), 2),
+             round(rng.uniform(250, 900), 4), rng.choice(['Pump', 'Valve', 'Reactor']))
+            for i in range(5000)
+        ]
+        self.assertMatchesBaseline(make_csv(rows))
+
+
+class UploadValidationTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        self.use_temp_media()
+        self.client.force_authenticate(User.objects.create_user('owner', password='pw'))
+
+    def test_csv_missing_required_column_is_rejected(self):
+        text = make_csv(
+            [('P1', 10, 100, 'Pump')],
+            header=['Equipment Name', 'Flowrate', 'Temperature', 'Type']
+        )
+        response = self.client.post(
+            '/api/upload/',
+            {'file': SimpleUploadedFile('plant.csv', text.encode('utf-8'), 'text/csv')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('missing required columns', response.data['detail'])
+        self.assertFalse(UploadedDataset.objects.exists())
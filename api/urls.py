@@ -7,6 +7,7 @@ from .views import (
     HistoryView,
     DatasetSummaryView,
     ReportView,
+    ReportStatusView,
     ReportFromSummaryView,
     MeView,     # NEW
 )
@@ -19,6 +20,7 @@ urlpatterns = [
     path('history/', HistoryView.as_view(), name='history'),
     path('summary/<int:pk>/', DatasetSummaryView.as_view(), name='summary'),
     path('report/<int:pk>/', ReportView.as_view(), name='report'),
+    path('report-status/<str:job_id>/', ReportStatusView.as_view(), name='report-status'),
     path('report-from-summary/', ReportFromSummaryView.as_view(), name='report-from-summary'),
 
     # NEW: User info endpoint for frontend refresh
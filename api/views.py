@@ -1,14 +1,32 @@
 # api/views.py
 import io
+import json
+from collections import OrderedDict
+import hashlib
 import logging
-from datetime import datetime
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.urls import reverse
+from django.http import JsonResponse, HttpResponse, FileResponse
+from django.db import connection
+from django.utils import timezone
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 
+import numpy as np
 import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: faster multithreaded CSV parsing
+    pa = pacsv = None
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -18,59 +36,165 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
-# Matplotlib (non-GUI backend)
+# Matplotlib (non-GUI backend, object-oriented API: no pyplot global state)
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from .models import UploadedDataset
+# Chunked, simplified paths keep Agg from doing quadratic work on dense line/hist charts
+matplotlib.rcParams['agg.path.chunksize'] = 10_000
+matplotlib.rcParams['path.simplify'] = True
+
+# Chart PNGs only get embedded in PDFs, so trade size for encode speed
+PNG_PIL_KWARGS = {'compress_level': 1, 'optimize': False}
+
+from .models import CHART_TYPES, UploadedDataset, ReportJob
 from .serializers import UploadedDatasetSerializer
 
 logger = logging.getLogger(__name__)
 
+# Part of the dataset report ETag (see dataset_report_etag). Bump it whenever the
+# report layout or chart rendering changes, so clients stop revalidating to 304
+# on PDFs built by the old code.
+REPORT_FORMAT_VERSION = 1
+
+# Rendered report charts are cached for this many seconds (see cached_chart_png)
+CHART_CACHE_TIMEOUT = 600
+# Preview rows read from CSVs of older uploads (see load_preview_rows)
+PREVIEW_CACHE_TIMEOUT = 3600
+
+NUMERIC_COLS = ['Flowrate', 'Pressure', 'Temperature']
+
+# Uploads are summarized chunk by chunk (see iter_csv_chunks)
+CSV_CHUNK_ROWS = 250_000          # pandas chunksize
+CSV_CHUNK_BYTES = 16 * 1024 * 1024  # pyarrow block size
+
+# Background report generation (ReportView ?async=1). Job state is a ReportJob
+# row, so every server process can answer the status poll; jobs (and their
+# PDFs) are kept for this many seconds.
+REPORT_JOB_TIMEOUT = 3600
+report_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='report')
+
+# Per-parameter analysis charts of one ad-hoc report are rendered in parallel
+chart_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='chart')
+
+# Charts render concurrently (request threads, report_executor, chart_executor),
+# so instead of sharing figures each thread keeps one Figure of its own
+_thread_figures = threading.local()
+
+
+def _thread_figure(width_inches, height_inches, dpi):
+    """
+    Return this thread's cleared Agg-backed Figure, resized to the given size.
+    Threads never share a figure, so no lock is needed around rendering.
+    Pass dpi to savefig explicitly: dpi='figure' keeps the figure's original dpi.
+    """
+    fig = getattr(_thread_figures, 'fig', None)
+    if fig is None:
+        fig = Figure(figsize=(width_inches, height_inches), dpi=dpi)
+        FigureCanvasAgg(fig)
+        _thread_figures.fig = fig
+    else:
+        fig.clear()
+        fig.set_size_inches(width_inches, height_inches)
+        fig.set_dpi(dpi)
+    return fig
+
+
+def _drop_thread_figure():
+    """Forget this thread's Figure (used after render errors)."""
+    _thread_figures.fig = None
+
+
+def _rotate_xticks(ax, fontsize=9):
+    ax.tick_params(axis='x', labelrotation=45, labelsize=fontsize)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+
+def _hist_bars(ax, values, **bar_kwargs):
+    """
+    Draw a histogram of ``values`` as precomputed bars: NumPy does the binning,
+    Matplotlib only draws one bar per bin.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values, bins=min(10, max(1, values.size)))
+    return ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **bar_kwargs)
+
+
+def is_trivial_chart(labels, chart_type='bar'):
+    """
+    True when a category chart would show at most one category. Those are not
+    rendered with Matplotlib; the PDF builders draw draw_chart_placeholder instead.
+    """
+    return chart_type != 'hist' and len(labels) <= 1
+
+
+def draw_chart_placeholder(p, x, y, w, values, h=48):
+    """
+    Draw a light box at (x, y) (top-left) listing ``values`` ({label: value})
+    in place of a chart image. Returns the y below the box.
+    """
+    text = ", ".join(f"{k}: {v}" for k, v in values.items()) or "No data"
+    p.saveState()
+    p.setFillColorRGB(245/255, 245/255, 245/255)
+    p.setStrokeColorRGB(220/255, 220/255, 220/255)
+    p.rect(x, y - h, w, h, fill=1, stroke=1)
+    p.setFont("Helvetica", 10)
+    p.setFillColorRGB(51/255, 51/255, 51/255)
+    p.drawCentredString(x + w / 2, y - h / 2 - 3, text)
+    p.restoreState()
+    return y - h - 12
+
 
 def create_chart_image(summary, chart_type='bar', width_inches=8, height_inches=3.5, dpi=100):
     """
     Create a PNG image BytesIO of a chart from 'summary' (type_distribution or numeric averages).
     Returns BytesIO (seeked to 0) or None on failure.
+    Draws on the calling thread's reusable Figure (see _thread_figure); on
+    failure that figure is dropped.
+    Returns None without rendering for trivial charts (see is_trivial_chart).
     """
     buf = io.BytesIO()
     try:
         type_dist = (summary or {}).get('type_distribution', {}) or {}
         labels = list(type_dist.keys())
+        if is_trivial_chart(labels, chart_type):
+            return None
         counts = [type_dist.get(k, 0) for k in labels]
 
         # fallback numeric values for histogram
         if chart_type == 'hist':
-            nums = []
             avgs = (summary or {}).get('averages', {}) or {}
-            for v in avgs.values():
-                if v is not None:
-                    nums.append(v)
-            if not nums:
-                nums = counts
+            nums = np.fromiter(
+                (v for v in avgs.values() if v is not None), dtype=np.float64
+            )
+            if not nums.size:
+                nums = np.asarray(counts, dtype=np.float64)
         else:
             nums = None
 
-        plt.figure(figsize=(width_inches, height_inches), dpi=dpi)
+        fig = _thread_figure(width_inches, height_inches, dpi)
+        ax = fig.add_subplot(111)
 
         if chart_type == 'bar':
-            plt.bar(labels, counts)
-            plt.title('Count by Equipment Type')
-            plt.ylabel('Count')
-            plt.xticks(rotation=45, ha='right', fontsize=9)
+            ax.bar(labels, counts)
+            ax.set_title('Count by Equipment Type')
+            ax.set_ylabel('Count')
+            _rotate_xticks(ax)
         elif chart_type == 'pie':
             if sum(counts) == 0:
-                plt.text(0.5, 0.5, 'No data', ha='center', va='center')
+                ax.text(0.5, 0.5, 'No data', ha='center', va='center')
             else:
-                wedges, texts, autotexts = plt.pie(
+                wedges, texts, autotexts = ax.pie(
                     counts,
                     labels=None,
                     autopct='%1.0f%%',
                     startangle=90,
                     textprops={'fontsize': 8}
                 )
-                plt.legend(
+                ax.legend(
                     wedges,
                     [str(s) for s in labels],
                     title="Type",
@@ -78,30 +202,32 @@ def create_chart_image(summary, chart_type='bar', width_inches=8, height_inches=
                     bbox_to_anchor=(1.02, 0.5),
                     fontsize=8,
                 )
-                plt.axis('equal')
-            plt.title('Type Distribution (%)')
+                ax.axis('equal')
+            ax.set_title('Type Distribution (%)')
         elif chart_type == 'line':
-            plt.plot(labels, counts, marker='o')
-            plt.title('Type counts (line)')
-            plt.ylabel('Count')
-            plt.xticks(rotation=45, ha='right', fontsize=9)
+            ax.plot(labels, counts, marker='o')
+            ax.set_title('Type counts (line)')
+            ax.set_ylabel('Count')
+            _rotate_xticks(ax)
         elif chart_type == 'hist':
-            if nums:
-                plt.hist(nums, bins=min(10, max(1, len(nums))), edgecolor='black')
-                plt.title('Histogram (numeric values)')
-                plt.xlabel('Value')
-                plt.ylabel('Frequency')
+            if len(nums):
+                _hist_bars(ax, nums, edgecolor='black')
+                ax.set_title('Histogram (numeric values)')
+                ax.set_xlabel('Value')
+                ax.set_ylabel('Frequency')
             else:
-                plt.text(0.5, 0.5, 'No numeric data', ha='center')
+                ax.text(0.5, 0.5, 'No numeric data', ha='center')
         else:
-            plt.bar(labels, counts)
-            plt.title('Count by Equipment Type')
-            plt.ylabel('Count')
-            plt.xticks(rotation=45, ha='right', fontsize=9)
-
-        plt.tight_layout(pad=0.4)
-        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1)
-        plt.close()
+            ax.bar(labels, counts)
+            ax.set_title('Count by Equipment Type')
+            ax.set_ylabel('Count')
+            _rotate_xticks(ax)
+
+        fig.tight_layout(pad=0.4)
+        fig.savefig(
+            buf, format='png', dpi=dpi, bbox_inches='tight', pad_inches=0.1,
+            pil_kwargs=PNG_PIL_KWARGS
+        )
         buf.seek(0)
 
         if buf.getbuffer().nbytes == 0:
@@ -110,11 +236,355 @@ def create_chart_image(summary, chart_type='bar', width_inches=8, height_inches=
 
     except Exception:
         logger.exception("create_chart_image failed")
+        _drop_thread_figure()
+        return None
+
+
+def create_analysis_chart_image(param, data_dict, param_chart_type='bar'):
+    """
+    Render the "Average <param> by Equipment Type" chart of the ad-hoc report.
+    Uses the thread's reusable Figure (see _thread_figure), so several
+    parameters can be rendered at once on chart_executor. Returns a
+    BytesIO (seeked to 0), or None when there is at most one type to show.
+    """
+    if len(data_dict) <= 1:
+        return None
+    buf = io.BytesIO()
+    fig = _thread_figure(7, 4, 100)
+    ax = fig.add_subplot(111)
+    labels = list(data_dict.keys())
+    vals = [
+        data_dict[k] if data_dict[k] is not None else 0
+        for k in labels
+    ]
+
+    if param_chart_type == 'bar':
+        ax.bar(
+            labels,
+            vals,
+            color='#007bff',
+            edgecolor='#0056b3',
+            linewidth=1.5
+        )
+    elif param_chart_type == 'pie':
+        if sum(vals) == 0:
+            ax.bar(labels, vals)
+        else:
+            colors = [
+                '#FF6B6B',
+                '#4ECDC4',
+                '#45B7D1',
+                '#FFA07A',
+                '#98D8C8'
+            ]
+            ax.pie(
+                vals,
+                labels=None,
+                autopct='%1.1f%%',
+                startangle=90,
+                colors=colors[:len(vals)]
+            )
+            ax.legend(
+                labels,
+                loc="center left",
+                bbox_to_anchor=(1.0, 0.5),
+                fontsize=9
+            )
+            ax.axis('equal')
+    elif param_chart_type == 'line':
+        ax.plot(
+            labels,
+            vals,
+            marker='o',
+            linewidth=2,
+            markersize=8,
+            color='#0056b3'
+        )
+        ax.fill_between(
+            range(len(labels)),
+            vals,
+            alpha=0.3,
+            color='#007bff'
+        )
+    elif param_chart_type == 'hist':
+        _hist_bars(
+            ax,
+            vals,
+            edgecolor='black',
+            color='#FF6B6B'
+        )
+    else:
+        ax.bar(
+            labels,
+            vals,
+            color='#007bff',
+            edgecolor='#0056b3',
+            linewidth=1.5
+        )
+
+    ax.set_title(
+        f'Average {param} by Equipment Type',
+        fontsize=12,
+        fontweight='bold',
+        pad=15
+    )
+    ax.set_ylabel(param, fontsize=10, fontweight='bold')
+    ax.set_xlabel('Equipment Type', fontsize=10, fontweight='bold')
+    _rotate_xticks(ax, fontsize=9)
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    fig.tight_layout(pad=0.5)
+    fig.savefig(
+        buf,
+        format='png',
+        bbox_inches='tight',
+        pad_inches=0.15,
+        dpi=100,
+        pil_kwargs=PNG_PIL_KWARGS
+    )
+    buf.seek(0)
+    return buf
+
+
+def iter_csv_chunks(source, columns, category_columns=(), use_arrow=True):
+    """
+    Yield DataFrames holding only the given columns (raw header names) of a
+    CSV path or open file, a block at a time, so memory is bounded by the
+    chunk size rather than the file size.
+    Uses pyarrow's multithreaded streaming reader when it is installed (it
+    skips the other columns at tokenization time); otherwise pandas with
+    usecols + chunksize. category_columns come back as pandas categoricals.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    if use_arrow and pacsv is not None:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=CSV_CHUNK_BYTES),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=list(columns),
+                column_types={
+                    c: pa.dictionary(pa.int32(), pa.string()) for c in category_columns
+                },
+                strings_can_be_null=True,
+            )
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(
+        source,
+        usecols=list(columns),
+        dtype={c: 'category' for c in category_columns},
+        chunksize=CSV_CHUNK_ROWS,
+    )
+
+
+def summarize_chunks(chunks):
+    """
+    Fold CSV chunks into the upload summary: total_count, averages and
+    per_type_averages (rounded to 2 decimals) and type_distribution (by
+    descending count). Values stay float64 (as pandas' mean() would use), so
+    large magnitudes keep their digits; only running sums/counts are kept
+    between chunks.
+    """
+    n_params = len(NUMERIC_COLS)
+    total_count = 0
+    sums = np.zeros(n_params)
+    counts = np.zeros(n_params, dtype=np.int64)
+    type_rows = {}     # type name -> row count
+    type_sums = {}     # type name -> per-param sums
+    type_valid = {}    # type name -> per-param non-NaN counts
+
+    for chunk in chunks:
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        for col in NUMERIC_COLS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float64)
+        total_count += len(chunk)
+
+        # One (rows x params) matrix gives overall and per-type sums/counts
+        vals = chunk[NUMERIC_COLS].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(vals)
+        filled = np.where(valid, vals, 0.0)
+        sums += filled.sum(axis=0)
+        counts += valid.sum(axis=0)
+
+        # Factorize Type once per chunk (categorical codes are reused as-is;
+        # NaN types get code -1 and are skipped), then a single bincount over
+        # (type code, param) cells gives every per-type sum and count
+        codes, uniques = pd.factorize(chunk['Type'])
+        n_types = len(uniques)
+        typed = codes >= 0
+        rows = np.bincount(codes[typed], minlength=n_types)
+        cells = (codes[typed, None] * n_params + np.arange(n_params)).ravel()
+        size = n_types * n_params
+        chunk_sums = np.bincount(
+            cells, weights=filled[typed].ravel(), minlength=size
+        ).reshape(n_types, n_params)
+        chunk_valid = np.bincount(
+            cells, weights=valid[typed].ravel(), minlength=size
+        ).reshape(n_types, n_params)
+
+        for i in range(n_types):
+            if not rows[i]:
+                continue
+            name = str(uniques[i])
+            if name in type_rows:
+                type_rows[name] += int(rows[i])
+                type_sums[name] += chunk_sums[i]
+                type_valid[name] += chunk_valid[i]
+            else:
+                type_rows[name] = int(rows[i])
+                type_sums[name] = chunk_sums[i].copy()
+                type_valid[name] = chunk_valid[i].copy()
+
+    names = sorted(type_rows)
+    return {
+        'total_count': total_count,
+        # stored pre-rounded: every client shows averages to 2 decimals
+        'averages': {
+            col: (round(float(sums[j] / counts[j]), 2) if counts[j] else None)
+            for j, col in enumerate(NUMERIC_COLS)
+        },
+        'type_distribution': {
+            name: type_rows[name]
+            for name in sorted(names, key=lambda n: -type_rows[n])
+        },
+        'per_type_averages': {
+            col: {
+                name: (
+                    round(float(type_sums[name][j] / type_valid[name][j]), 2)
+                    if type_valid[name][j] else None
+                )
+                for name in names
+            }
+            for j, col in enumerate(NUMERIC_COLS)
+        },
+    }
+
+
+def summarize_csv(source, columns, category_columns=()):
+    """
+    Stream a CSV through summarize_chunks. pyarrow infers column types from
+    the first block, so a later block that does not fit (e.g. text in a
+    numeric column) makes it fail; the file is then re-read with pandas.
+    """
+    if pacsv is not None:
         try:
-            plt.close()
+            return summarize_chunks(iter_csv_chunks(source, columns, category_columns))
         except Exception:
-            pass
+            logger.warning("pyarrow CSV parse failed, falling back to pandas", exc_info=True)
+    return summarize_chunks(
+        iter_csv_chunks(source, columns, category_columns, use_arrow=False)
+    )
+
+
+def preview_records(df, n=8):
+    """
+    Return the first n rows of df as a list of dicts.
+    Builds the records from per-column lists instead of to_dict(orient='records'),
+    which avoids pandas' per-cell boxing and yields plain Python scalars.
+    """
+    head = df.head(n)
+    cols = [str(c) for c in head.columns]
+    # NaN -> None so the rows are valid JSON (they are stored in summary)
+    arrs = [
+        [None if isinstance(v, float) and v != v else v for v in head[c].tolist()]
+        for c in head.columns
+    ]
+    return [dict(zip(cols, row)) for row in zip(*arrs)]
+
+
+def _read_preview_from_csv(obj, n=8):
+    # nrows: the parser stops after the preview rows instead of reading the file.
+    # FieldFile.open lets the storage backend pick how to open it (local path,
+    # remote stream) without an extra exists/stat round-trip first.
+    with obj.csv_file.open('rb') as fh:
+        df = pd.read_csv(fh, nrows=n)
+    df.columns = [str(c).strip() for c in df.columns]
+    return preview_records(df, n)
+
+
+def load_preview_rows(obj):
+    """
+    Return the preview rows for a stored dataset.
+    Uploads store them in summary['preview_rows']; older uploads without that
+    key fall back to reading the head of the CSV, cached per stored file.
+    """
+    summary = obj.summary or {}
+    if 'preview_rows' in summary:
+        return summary.get('preview_rows') or []
+
+    key = f"preview:{obj.pk}:{obj.csv_file.name}"
+    rows = cache.get(key)
+    if rows is None:
+        try:
+            rows = _read_preview_from_csv(obj)
+        except Exception:
+            logger.exception("Failed to read CSV for preview (pk=%s)", obj.pk)
+            return []
+        cache.set(key, rows, PREVIEW_CACHE_TIMEOUT)
+    return rows
+
+
+def store_chart_images(obj, summary):
+    """
+    Render every chart type once and save the PNGs next to the upload, so
+    reports for stored datasets only have to read them back.
+    Failures are logged and skipped; cached_chart_png renders on demand.
+    """
+    for chart_type in CHART_TYPES:
+        chart_buf = create_chart_image(summary, chart_type=chart_type)
+        if not chart_buf:
+            continue
+        name = obj.chart_image_name(chart_type)
+        try:
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(chart_buf.getvalue()))
+        except Exception:
+            logger.exception("Failed to store %s chart for dataset %s", chart_type, obj.pk)
+
+
+def summary_digest(summary):
+    """Stable md5 hex digest of a summary dict (key order independent)."""
+    return hashlib.md5(
+        json.dumps(summary or {}, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+def clean_chart_type(chart_type):
+    """Return ``chart_type`` if it is one of CHART_TYPES, else 'bar'."""
+    return chart_type if chart_type in CHART_TYPES else 'bar'
+
+
+def cached_chart_png(obj, summary, chart_type='bar'):
+    """
+    Return PNG bytes of the chart for a stored dataset.
+    The image pre-rendered at upload time is used when present; otherwise the
+    chart is rendered and kept in Django's cache. The cache key includes the
+    upload timestamp and a hash of the summary, so a new upload (or changed
+    summary) never hits a stale image.
+    Returns bytes or None on failure, and None for a chart_type outside
+    CHART_TYPES (it would end up in the storage name and cache key).
+    """
+    if chart_type not in CHART_TYPES:
         return None
+    name = obj.chart_image_name(chart_type)
+    try:
+        with default_storage.open(name, mode='rb') as fh:
+            return fh.read()
+    except Exception:
+        pass
+
+    key = f"chart:{obj.pk}:{chart_type}:{obj.uploaded_at.timestamp()}:{summary_digest(summary)}"
+    png = cache.get(key)
+    if png is None:
+        chart_buf = create_chart_image(summary, chart_type=chart_type)
+        if not chart_buf:
+            return None
+        png = chart_buf.getvalue()
+        cache.set(key, png, CHART_CACHE_TIMEOUT)
+    return png
 
 
 def api_root(request):
@@ -166,11 +636,17 @@ class UploadCSVView(APIView):
             )
 
         filename = uploaded_file.name
+        # Large uploads are spooled to disk by Django; parse those from the path
+        if hasattr(uploaded_file, 'temporary_file_path'):
+            csv_source = uploaded_file.temporary_file_path()
+        else:
+            csv_source = uploaded_file
 
-        # Read CSV into pandas
+        # Read just the header + first rows (preview and column validation)
         try:
-            uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file)
+            if hasattr(csv_source, 'seek'):
+                csv_source.seek(0)
+            head_df = pd.read_csv(csv_source, nrows=8)
         except Exception as e:
             logger.exception("Failed to read CSV on upload: %s", e)
             return Response(
@@ -179,57 +655,43 @@ class UploadCSVView(APIView):
             )
 
         # Normalize columns
-        df.columns = [str(c).strip() for c in df.columns]
+        raw_names = {str(c).strip(): c for c in head_df.columns}
+        head_df.columns = list(raw_names)
         required = {'Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'}
-        if not required.issubset(set(df.columns)):
+        if not required.issubset(set(head_df.columns)):
             return Response(
                 {
                     "detail": (
                         f"CSV missing required columns. "
-                        f"Required: {sorted(required)}. Found: {list(df.columns)}"
+                        f"Required: {sorted(required)}. Found: {list(head_df.columns)}"
                     )
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Coerce numeric cols
-        for col in ['Flowrate', 'Pressure', 'Temperature']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # compute summary
-        numeric_cols = ['Flowrate', 'Pressure', 'Temperature']
-        averages = {
-            col: (float(df[col].mean()) if not df[col].dropna().empty else None)
-            for col in numeric_cols
-        }
-        type_distribution = df['Type'].value_counts().to_dict()
-        total_count = int(df.shape[0])
-
-        summary = {
-            'total_count': total_count,
-            'averages': averages,
-            'type_distribution': type_distribution
-        }
-
-        # per-type averages
+        for col in NUMERIC_COLS:
+            head_df[col] = pd.to_numeric(head_df[col], errors='coerce')
+
+        # Stream the whole file, only the required columns, into the summary
         try:
-            per_type_avgs = {}
-            for col in numeric_cols:
-                grouped = df.groupby('Type')[col].mean()
-                per_type_avgs[col] = {
-                    str(k): (float(v) if not pd.isna(v) else None)
-                    for k, v in grouped.to_dict().items()
-                }
-            summary['per_type_averages'] = per_type_avgs
-        except Exception:
-            logger.exception("Failed computing per_type_averages")
-            summary['per_type_averages'] = {}
+            summary = summarize_csv(
+                csv_source,
+                [raw_names[c] for c in sorted(required)],
+                category_columns=[raw_names['Type']]
+            )
+        except Exception as e:
+            logger.exception("Failed to read CSV on upload: %s", e)
+            return Response(
+                {"detail": f"Failed to read CSV: {str(e)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         # preview rows
         try:
-            preview_rows = df.head(8).to_dict(orient='records')
+            preview_rows = preview_records(head_df)
         except Exception:
             preview_rows = []
+        summary['preview_rows'] = preview_rows
 
         # Save file content and create model instance — attach current user
         try:
@@ -238,13 +700,12 @@ class UploadCSVView(APIView):
             pass
 
         try:
-            content = uploaded_file.read()
-            django_file = ContentFile(content, name=filename)
-
+            # Hand the upload itself to storage: it is copied in chunks (or moved,
+            # for disk-backed temp uploads) instead of read() into one bytes object
             obj = UploadedDataset.objects.create(
                 user=request.user,
                 original_filename=filename,
-                csv_file=django_file,
+                csv_file=uploaded_file,
                 summary=summary
             )
         except Exception as e:
@@ -254,21 +715,19 @@ class UploadCSVView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        # Render the report charts now so report requests only embed them
+        store_chart_images(obj, summary)
+
         # Prune older entries for THIS USER: keep only last 5
         try:
-            qs_user = UploadedDataset.objects.filter(
-                user=request.user
-            ).order_by('-uploaded_at')
-            to_delete = list(qs_user[5:])
-            for old in to_delete:
-                try:
-                    old.csv_file.delete(save=False)
-                except Exception:
-                    pass
-            if to_delete:
-                UploadedDataset.objects.filter(
-                    pk__in=[i.pk for i in to_delete]
-                ).delete()
+            old_pks = list(
+                UploadedDataset.objects.filter(user=request.user)
+                .order_by('-uploaded_at')
+                .values_list('pk', flat=True)[5:]
+            )
+            if old_pks:
+                # one bulk DELETE; the post_delete signal queues the file cleanup
+                UploadedDataset.objects.filter(pk__in=old_pks).delete()
         except Exception:
             logger.exception("Failed pruning old UploadedDataset entries (per-user)")
 
@@ -306,6 +765,8 @@ class HistoryView(APIView):
     def get(self, request, format=None):
         qs = UploadedDataset.objects.filter(
             user=request.user
+        ).only(
+            'id', 'original_filename', 'uploaded_at', 'csv_file', 'summary'
         ).order_by('-uploaded_at')[:5]
         instances = list(qs)
         serializer = UploadedDatasetSerializer(
@@ -335,161 +796,267 @@ class DatasetSummaryView(APIView):
     def get(self, request, pk, format=None):
         obj = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
 
-        preview_rows = []
+        preview_rows = load_preview_rows(obj)
+        return Response({'summary': obj.summary or {}, 'preview_rows': preview_rows})
+
+
+def dataset_report_etag(obj, chart_type):
+    """
+    Validator for the report ReportView builds for ``obj``: it changes whenever
+    anything drawn into the PDF does, including the report code itself
+    (REPORT_FORMAT_VERSION). Weak, because ReportLab stamps each build with
+    its own creation date.
+    """
+    digest = hashlib.md5(
+        f"{REPORT_FORMAT_VERSION}:{obj.pk}:{chart_type}:{obj.original_filename}:"
+        f"{obj.uploaded_at.timestamp()}:{summary_digest(obj.summary)}".encode('utf-8')
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def build_dataset_report(obj, chart_type='bar'):
+    """
+    Render the PDF report (summary + chart + preview) for a stored UploadedDataset.
+    Returns the PDF as bytes; raises if the PDF itself cannot be built.
+    Shared by ReportView and the background report jobs.
+    """
+    chart_type = clean_chart_type(chart_type)
+    preview_rows = load_preview_rows(obj)
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Header
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(72, height - 72, "Chemical Equipment Report")
+    p.setFont("Helvetica", 10)
+    p.drawString(72, height - 90, f"File: {obj.original_filename}")
+    p.drawString(
+        72,
+        height - 104,
+        f"Uploaded at: {obj.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+
+    # Summary information
+    summary = obj.summary or {}
+    y = height - 130
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(72, y, "Summary")
+    y -= 16
+    p.setFont("Helvetica", 10)
+    p.drawString(
+        80, y, f"Total equipment: {summary.get('total_count', 'N/A')}"
+    )
+    y -= 14
+
+    averages = summary.get('averages', {})
+    p.drawString(80, y, "Averages:")
+    y -= 12
+    if isinstance(averages, dict):
+        # one text object for the block; textLine advances by the leading
+        to = p.beginText(92, y)
+        to.setLeading(12)
+        # averages are stored rounded, but :.2f is kept over str(v): it pads
+        # 5.0 to 5.00 and still rounds summaries saved before rounding
+        for k, v in averages.items():
+            try:
+                to.textLine(f"{k}: {('N/A' if v is None else f'{v:.2f}')}")
+            except Exception:
+                to.textLine(f"{k}: {v}")
+            y -= 12
+        p.drawText(to)
+
+    # Type distribution
+    y -= 6
+    p.setFont("Helvetica-Bold", 11)
+    p.drawString(72, y, "Type distribution")
+    y -= 14
+    type_dist = summary.get('type_distribution', {})
+    if isinstance(type_dist, dict):
+        to = p.beginText(80, y)
+        to.setLeading(12)
+        for t, count in type_dist.items():
+            to.textLine(f"{t}: {count}")
+            y -= 12
+            if y < 180:
+                p.drawText(to)
+                p.showPage()
+                y = height - 72
+                to = p.beginText(80, y)
+                to.setLeading(12)
+        p.drawText(to)
+
+    # Insert chart image
+    chart_png = cached_chart_png(obj, summary, chart_type=chart_type)
+    if chart_png:
         try:
-            if getattr(obj.csv_file, 'path', None):
-                df = pd.read_csv(obj.csv_file.path)
-            else:
-                with default_storage.open(obj.csv_file.name, mode='rb') as fh:
-                    df = pd.read_csv(fh)
-            df.columns = [str(c).strip() for c in df.columns]
-            preview_rows = df.head(8).to_dict(orient='records')
+            img = ImageReader(io.BytesIO(chart_png))
+            img_w = 440
+            img_h = 240
+            x = 72
+            y_img = y - img_h - 10
+            if y_img < 72:
+                p.showPage()
+                y_img = height - 72 - img_h
+            p.drawImage(img, x, y_img, width=img_w, height=img_h)
+            y = y_img - 12
         except Exception:
             logger.exception(
-                "Failed to read CSV for preview in DatasetSummaryView (pk=%s)", pk
+                "Failed to embed chart image for dataset %s", obj.pk
             )
-            preview_rows = []
+    elif isinstance(type_dist, dict) and is_trivial_chart(type_dist, chart_type):
+        if y < 140:
+            p.showPage()
+            y = height - 72
+        y = draw_chart_placeholder(p, 72, y - 10, 440, type_dist)
 
-        return Response({'summary': obj.summary or {}, 'preview_rows': preview_rows})
+    # Preview table
+    if preview_rows:
+        if y < 200:
+            p.showPage()
+            y = height - 72
+        p.setFont("Helvetica-Bold", 11)
+        p.drawString(72, y, "Preview (first rows)")
+        y -= 18
+        cols = list(preview_rows[0].keys())
+        col_x = [72 + 110 * i for i in range(len(cols))]
+        # one text object for header + rows (per page): a single BT/ET block
+        # and one font selection instead of one per row
+        to = p.beginText()
+        to.setFont("Helvetica", 9)
+        for x, col in zip(col_x, cols):
+            to.setTextOrigin(x, y)
+            to.textOut(str(col)[:15])
+        y -= 14
+        for row in preview_rows[:8]:
+            for x, col in zip(col_x, cols):
+                val = row.get(col)
+                to.setTextOrigin(x, y)
+                to.textOut(('' if val is None else str(val))[:15])
+            y -= 12
+            if y < 72:
+                p.drawText(to)
+                p.showPage()
+                y = height - 72
+                to = p.beginText()
+                to.setFont("Helvetica", 9)
+        p.drawText(to)
 
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
 
-class ReportView(APIView):
+
+def _finish_report_job(job, build):
     """
-    GET /api/report/<pk>/
-    Generates a PDF report for the stored dataset (summary + chart + preview)
-    Only for the owner (request.user).
+    Worker body shared by the report jobs: build the PDF with build(), save it
+    as <job_id>.pdf in the private report storage and mark the job done, or
+    failed if anything raises.
     """
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get(self, request, pk, format=None):
-        obj = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
-
-        df = None
+    try:
         try:
-            if getattr(obj.csv_file, 'path', None):
-                df = pd.read_csv(obj.csv_file.path)
-            else:
-                with default_storage.open(obj.csv_file.name, mode='rb') as fh:
-                    df = pd.read_csv(fh)
+            pdf = build()
+            name = job.file.storage.save(f"{job.pk}.pdf", ContentFile(pdf))
         except Exception:
-            logger.exception("Failed to read CSV for ReportView (pk=%s)", pk)
-            df = None
+            logger.exception("Background report job %s failed", job.pk)
+            ReportJob.objects.filter(pk=job.pk).update(state=ReportJob.STATE_FAILED)
+            return
 
-        chart_type = request.GET.get('chart_type', 'bar')
+        updated = ReportJob.objects.filter(pk=job.pk).update(
+            state=ReportJob.STATE_DONE, file=name
+        )
+        if not updated:
+            # the job went away while it was running (its dataset was deleted)
+            job.file.storage.delete(name)
+    finally:
+        # this thread is not a request, so nothing else closes its connection
+        connection.close()
 
-        try:
-            buffer = io.BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-            width, height = letter
 
-            # Header
-            p.setFont("Helvetica-Bold", 16)
-            p.drawString(72, height - 72, "Chemical Equipment Report")
-            p.setFont("Helvetica", 10)
-            p.drawString(72, height - 90, f"File: {obj.original_filename}")
-            p.drawString(
-                72,
-                height - 104,
-                f"Uploaded at: {obj.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}"
-            )
+def run_report_job(job, obj, chart_type):
+    """Background worker body for ReportView ?async=1."""
+    chart_type = clean_chart_type(chart_type)
+    _finish_report_job(job, lambda: build_dataset_report(obj, chart_type=chart_type))
 
-            # Summary information
-            summary = obj.summary or {}
-            y = height - 130
-            p.setFont("Helvetica-Bold", 12)
-            p.drawString(72, y, "Summary")
-            y -= 16
-            p.setFont("Helvetica", 10)
-            p.drawString(
-                80, y, f"Total equipment: {summary.get('total_count', 'N/A')}"
-            )
-            y -= 14
 
-            averages = summary.get('averages', {})
-            p.drawString(80, y, "Averages:")
-            y -= 12
-            if isinstance(averages, dict):
-                for k, v in averages.items():
-                    try:
-                        p.drawString(
-                            92,
-                            y,
-                            f"{k}: {('N/A' if v is None else f'{v:.2f}')}"
-                        )
-                    except Exception:
-                        p.drawString(92, y, f"{k}: {v}")
-                    y -= 12
-
-            # Type distribution
-            y -= 6
-            p.setFont("Helvetica-Bold", 11)
-            p.drawString(72, y, "Type distribution")
-            y -= 14
-            type_dist = summary.get('type_distribution', {})
-            if isinstance(type_dist, dict):
-                for t, count in type_dist.items():
-                    p.drawString(80, y, f"{t}: {count}")
-                    y -= 12
-                    if y < 180:
-                        p.showPage()
-                        y = height - 72
-
-            # Insert chart image
-            chart_buf = create_chart_image(summary, chart_type=chart_type)
-            if chart_buf:
-                try:
-                    img = ImageReader(chart_buf)
-                    img_w = 440
-                    img_h = 240
-                    x = 72
-                    y_img = y - img_h - 10
-                    if y_img < 72:
-                        p.showPage()
-                        y_img = height - 72 - img_h
-                    p.drawImage(img, x, y_img, width=img_w, height=img_h)
-                    y = y_img - 12
-                except Exception:
-                    logger.exception(
-                        "Failed to embed chart image for dataset %s", pk
-                    )
+def run_summary_report_job(job, data, username):
+    """Background worker body for ReportFromSummaryView ?async=1."""
+    _finish_report_job(job, lambda: build_summary_report(data, username=username))
 
-            # Preview table
-            if df is not None and not df.empty:
-                if y < 200:
-                    p.showPage()
-                    y = height - 72
-                p.setFont("Helvetica-Bold", 11)
-                p.drawString(72, y, "Preview (first rows)")
-                y -= 18
-                p.setFont("Helvetica", 9)
-                preview = df.head(8)
-                cols = preview.columns.tolist()
-                x = 72
-                for col in cols:
-                    p.drawString(x, y, str(col)[:15])
-                    x += 110
-                y -= 14
-                for _, row in preview.iterrows():
-                    x = 72
-                    for col in cols:
-                        cell = str(row[col])[:15]
-                        p.drawString(x, y, cell)
-                        x += 110
-                    y -= 12
-                    if y < 72:
-                        p.showPage()
-                        y = height - 72
 
-            p.showPage()
-            p.save()
-            buffer.seek(0)
+def prune_report_jobs():
+    """
+    Delete ReportJobs older than REPORT_JOB_TIMEOUT. Their PDFs are removed by
+    the post_delete signal in api.models.
+    """
+    cutoff = timezone.now() - timedelta(seconds=REPORT_JOB_TIMEOUT)
+    ReportJob.objects.filter(created_at__lt=cutoff).delete()
+
 
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = (
-                f'attachment; filename="report_dataset_{pk}.pdf"'
+def start_report_job(request, worker, *args, dataset=None, filename='report.pdf'):
+    """
+    Record a pending ReportJob for request.user, queue worker(job, *args) on
+    report_executor and return the 202 response pointing at ReportStatusView.
+    Expired jobs are pruned first, so their files do not pile up.
+    """
+    try:
+        prune_report_jobs()
+    except Exception:
+        logger.exception("Failed pruning expired report jobs")
+
+    job = ReportJob.objects.create(
+        id=uuid.uuid4().hex,
+        user=request.user,
+        dataset=dataset,
+        filename=filename
+    )
+    report_executor.submit(worker, job, *args)
+    return Response(
+        {
+            'job_id': job.pk,
+            'state': job.state,
+            'status_url': request.build_absolute_uri(
+                reverse('report-status', args=[job.pk])
+            ),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+class ReportView(APIView):
+    """
+    GET /api/report/<pk>/
+    Generates a PDF report for the stored dataset (summary + chart + preview)
+    Only for the owner (request.user).
+    With ?async=1 the report is built by a background worker instead: responds
+    202 with a job_id to poll at /api/report-status/<job_id>/.
+    Synchronous responses carry ETag/Last-Modified; a matching If-None-Match
+    or If-Modified-Since gets a 304 without rebuilding the PDF.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, format=None):
+        obj = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
+        # only known chart types reach storage names, cache keys and the ETag
+        chart_type = clean_chart_type(request.GET.get('chart_type', 'bar'))
+
+        if request.GET.get('async') in ('1', 'true', 'yes'):
+            return start_report_job(
+                request, run_report_job, obj, chart_type,
+                dataset=obj, filename=f"report_dataset_{pk}.pdf"
             )
-            return response
 
+        etag = dataset_report_etag(obj, chart_type)
+        last_modified = int(obj.uploaded_at.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return self.private(not_modified)
+
+        try:
+            pdf = build_dataset_report(obj, chart_type=chart_type)
         except Exception:
             logger.exception("Failed to generate PDF for dataset %s", pk)
             return Response(
@@ -497,359 +1064,362 @@ class ReportView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-
-class ReportFromSummaryView(APIView):
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = (
+            f'attachment; filename="report_dataset_{pk}.pdf"'
+        )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return self.private(response)
+
+    @staticmethod
+    def private(response):
+        """
+        Mark a per-user report response (200 or 304) as not storable by shared
+        caches: the validators make it look cacheable otherwise.
+        """
+        patch_cache_control(response, private=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class ReportStatusView(APIView):
     """
-    POST /api/report-from-summary/
-    Accepts a summary + preview_rows + include options and returns a generated PDF.
+    GET /api/report-status/<job_id>/
+    Returns the state ('pending' | 'done' | 'failed') of a background report job
+    started with GET /api/report/<pk>/?async=1 or POST /api/report-from-summary/?async=1.
+    Once done, 'url' points at ?download=1 on this endpoint, which returns the PDF.
+    Only the user who started the job can see it or download it, and only for
+    REPORT_JOB_TIMEOUT seconds.
     """
     permission_classes = [permissions.IsAuthenticated]
 
-    def post(self, request, format=None):
-        data = request.data or {}
-        summary = data.get("summary", {}) or {}
-        preview_rows = data.get("preview_rows", None)
-        filename = data.get("filename") or "report.pdf"
-        include = data.get("include", {}) or {}
-        analysis_chart_types = data.get("analysis_chart_types", {}) or {}
-
-        # defaults and selections from include block
-        chart_type = include.get("type_chart_type", include.get("chart_type", "bar"))
-        inc_summary = include.get("summary", True)
-        inc_type_chart = include.get("type_chart", True)
-        inc_preview = include.get("preview_rows", True)
-
-        analysis_cfg = include.get("analysis", {}) or {}
-        inc_analysis = analysis_cfg.get("include", False)
-        analysis_mode = analysis_cfg.get("mode", "all")
+    def get(self, request, job_id, format=None):
+        cutoff = timezone.now() - timedelta(seconds=REPORT_JOB_TIMEOUT)
+        job = ReportJob.objects.filter(
+            pk=job_id, user=request.user, created_at__gte=cutoff
+        ).first()
+        if job is None:
+            return Response(
+                {'detail': 'Unknown report job.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        try:
-            buffer = io.BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-            width, height = letter
-
-            # Color scheme
-            primary_color = (0, 123/255, 255/255)  # #007bff
-            dark_gray = (51/255, 51/255, 51/255)   # #333
-            light_gray = (245/255, 245/255, 245/255)  # #f5f5f5
-
-            # Helper to draw section header
-            def draw_section_header(canvas_obj, text, y_pos):
-                canvas_obj.setFillColorRGB(*light_gray)
-                canvas_obj.rect(72, y_pos - 20, width - 144, 24, fill=1, stroke=0)
-                canvas_obj.setFont("Helvetica-Bold", 13)
-                canvas_obj.setFillColorRGB(*dark_gray)
-                canvas_obj.drawString(80, y_pos - 8, text)
-                return y_pos - 36
-
-            # Title + metadata
-            p.setFont("Helvetica-Bold", 22)
-            p.setFillColorRGB(*primary_color)
-            p.drawString(72, height - 50, "Chemical Equipment Analysis Report")
+        done = job.state == ReportJob.STATE_DONE and bool(job.file)
+        if request.GET.get('download') in ('1', 'true', 'yes'):
+            if not done:
+                return Response(
+                    {'detail': 'Report is not ready.', 'state': job.state},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return FileResponse(
+                job.file.open('rb'),
+                as_attachment=True,
+                filename=job.filename,
+                content_type='application/pdf'
+            )
 
-            p.setFont("Helvetica", 10)
-            p.setFillColorRGB(*dark_gray)
-            username = getattr(request.user, "username", "user")
-            p.drawString(72, height - 70, f"Generated by: {username}")
-            p.drawString(
-                72,
-                height - 85,
-                f"Date: {datetime.now().strftime('%B %d, %Y at %H:%M:%S')}"
+        data = {'job_id': job.pk, 'state': job.state}
+        if done:
+            data['url'] = request.build_absolute_uri(
+                reverse('report-status', args=[job.pk]) + '?download=1'
             )
+        return Response(data)
 
-            p.setLineWidth(1.5)
-            p.setStrokeColorRGB(*primary_color)
-            p.line(72, height - 95, width - 72, height - 95)
 
-            y = height - 120
+def build_summary_report(data, username='user'):
+    """
+    Build the ad-hoc PDF for ReportFromSummaryView from the posted payload
+    (summary, preview_rows, include options, analysis_chart_types).
+    Returns the PDF as bytes; raises on failure.
+    """
+    summary = data.get("summary", {}) or {}
+    preview_rows = data.get("preview_rows", None)
+    include = data.get("include", {}) or {}
+    analysis_chart_types = data.get("analysis_chart_types", {}) or {}
+
+    # defaults and selections from include block
+    chart_type = include.get("type_chart_type", include.get("chart_type", "bar"))
+    inc_summary = include.get("summary", True)
+    inc_type_chart = include.get("type_chart", True)
+    inc_preview = include.get("preview_rows", True)
+
+    analysis_cfg = include.get("analysis", {}) or {}
+    inc_analysis = analysis_cfg.get("include", False)
+    analysis_mode = analysis_cfg.get("mode", "all")
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Color scheme
+    primary_color = (0, 123/255, 255/255)  # #007bff
+    dark_gray = (51/255, 51/255, 51/255)   # #333
+    light_gray = (245/255, 245/255, 245/255)  # #f5f5f5
+
+    # Helper to draw section header
+    def draw_section_header(canvas_obj, text, y_pos):
+        canvas_obj.setFillColorRGB(*light_gray)
+        canvas_obj.rect(72, y_pos - 20, width - 144, 24, fill=1, stroke=0)
+        canvas_obj.setFont("Helvetica-Bold", 13)
+        canvas_obj.setFillColorRGB(*dark_gray)
+        canvas_obj.drawString(80, y_pos - 8, text)
+        return y_pos - 36
+
+    # Title + metadata
+    p.setFont("Helvetica-Bold", 22)
+    p.setFillColorRGB(*primary_color)
+    p.drawString(72, height - 50, "Chemical Equipment Analysis Report")
+
+    p.setFont("Helvetica", 10)
+    p.setFillColorRGB(*dark_gray)
+    p.drawString(72, height - 70, f"Generated by: {username}")
+    p.drawString(
+        72,
+        height - 85,
+        f"Date: {datetime.now().strftime('%B %d, %Y at %H:%M:%S')}"
+    )
+
+    p.setLineWidth(1.5)
+    p.setStrokeColorRGB(*primary_color)
+    p.line(72, height - 95, width - 72, height - 95)
+
+    y = height - 120
+
+    # SUMMARY SECTION
+    if inc_summary:
+        y = draw_section_header(p, "Summary Statistics", y)
+        p.setFillColorRGB(*dark_gray)
+
+        total_count = summary.get('total_count', 'N/A')
+        p.setFont("Helvetica-Bold", 11)
+        p.drawString(80, y, f"Total Equipment Records: {total_count}")
+        y -= 20
+
+        p.setFont("Helvetica-Bold", 10)
+        p.drawString(80, y, "Parameter Averages:")
+        y -= 14
+
+        averages = summary.get('averages', {}) or {}
+        p.setFont("Helvetica", 10)
+        if isinstance(averages, dict):
+            to = p.beginText(92, y)
+            to.setLeading(12)
+            for k, v in averages.items():
+                try:
+                    # :.2f rather than str(v): client-sent summaries may be unrounded, and 5.0 prints as 5.00
+                    val_str = f"{v:.2f}" if v is not None else "N/A"
+                except Exception:
+                    val_str = str(v) if v is not None else "N/A"
+                to.textLine(f"• {k}: {val_str}")
+                y -= 12
+            p.drawText(to)
+        y -= 8
+
+    # TYPE distribution chart
+    if inc_type_chart:
+        if y < 280:
+            p.showPage()
+            y = height - 50
 
-            # SUMMARY SECTION
-            if inc_summary:
-                y = draw_section_header(p, "Summary Statistics", y)
-                p.setFont("Helvetica", 10)
-                p.setFillColorRGB(*dark_gray)
+        y = draw_section_header(p, "Equipment Type Distribution", y)
 
-                total_count = summary.get('total_count', 'N/A')
-                p.setFont("Helvetica-Bold", 11)
-                p.drawString(80, y, f"Total Equipment Records: {total_count}")
+        type_dist = summary.get('type_distribution') or {}
+        chart_buf = create_chart_image(
+            summary,
+            chart_type=chart_type,
+            width_inches=7,
+            height_inches=4,
+            dpi=100
+        )
+        if chart_buf:
+            try:
+                img = ImageReader(chart_buf)
+                img_w = width - 144
+                img_h = 300
+                p.drawImage(img, 72, y - img_h, width=img_w, height=img_h)
+                y -= (img_h + 20)
+            except Exception:
+                logger.exception(
+                    "Failed to embed type distribution chart in ad-hoc report"
+                )
+                p.setFont("Helvetica", 10)
+                p.setFillColorRGB(220/255, 53/255, 69/255)
+                p.drawString(
+                    72, y, "Failed to render type distribution chart."
+                )
                 y -= 20
+        elif isinstance(type_dist, dict) and is_trivial_chart(type_dist, chart_type):
+            y = draw_chart_placeholder(p, 72, y, width - 144, type_dist)
+        else:
+            p.setFont("Helvetica", 10)
+            p.setFillColorRGB(*dark_gray)
+            p.drawString(72, y, "Type distribution chart not available.")
+            y -= 20
+
+    # ANALYSIS charts (per-type averages)
+    if inc_analysis:
+        per_type_avgs = (summary or {}).get('per_type_averages', {}) or {}
+        if analysis_mode == 'all':
+            params_to_draw = ['Flowrate', 'Pressure', 'Temperature']
+        else:
+            params_to_draw = ['Flowrate', 'Pressure', 'Temperature']
 
-                p.setFont("Helvetica-Bold", 10)
-                p.drawString(80, y, "Parameter Averages:")
-                y -= 14
-
-                averages = summary.get('averages', {}) or {}
-                p.setFont("Helvetica", 10)
-                if isinstance(averages, dict):
-                    for k, v in averages.items():
-                        try:
-                            val_str = f"{v:.2f}" if v is not None else "N/A"
-                        except Exception:
-                            val_str = str(v) if v is not None else "N/A"
-                        p.drawString(92, y, f"• {k}: {val_str}")
-                        y -= 12
-                y -= 8
-
-            # TYPE distribution chart
-            if inc_type_chart:
-                if y < 280:
+        if not per_type_avgs:
+            if y < 200:
+                p.showPage()
+                y = height - 50
+            y = draw_section_header(p, "Parameter Analysis", y)
+            p.setFont("Helvetica", 10)
+            p.setFillColorRGB(*dark_gray)
+            p.drawString(
+                72, y,
+                "Per-type averages not available for this dataset."
+            )
+            y -= 20
+        else:
+            # render every chart up front (in parallel), then lay them out in order
+            jobs = [
+                (param, per_type_avgs.get(param, {}) or {})
+                for param in params_to_draw
+            ]
+            jobs = [(param, data_dict) for param, data_dict in jobs if data_dict]
+            futures = [
+                chart_executor.submit(
+                    create_analysis_chart_image,
+                    param,
+                    data_dict,
+                    analysis_chart_types.get(param, 'bar')
+                    if isinstance(analysis_chart_types, dict)
+                    else 'bar'
+                )
+                for param, data_dict in jobs
+            ]
+            for (param, data_dict), future in zip(jobs, futures):
+                if y < 350:
                     p.showPage()
                     y = height - 50
 
-                y = draw_section_header(p, "Equipment Type Distribution", y)
-
-                chart_buf = create_chart_image(
-                    summary,
-                    chart_type=chart_type,
-                    width_inches=7,
-                    height_inches=4,
-                    dpi=100
+                y = draw_section_header(
+                    p, f"Analysis - Average {param} by Type", y
                 )
-                if chart_buf:
-                    try:
-                        img = ImageReader(chart_buf)
-                        img_w = width - 144
-                        img_h = 300
-                        p.drawImage(img, 72, y - img_h, width=img_w, height=img_h)
-                        y -= (img_h + 20)
-                    except Exception:
-                        logger.exception(
-                            "Failed to embed type distribution chart in ad-hoc report"
-                        )
-                        p.setFont("Helvetica", 10)
-                        p.setFillColorRGB(220/255, 53/255, 69/255)
-                        p.drawString(
-                            72, y, "Failed to render type distribution chart."
-                        )
-                        y -= 20
-                else:
-                    p.setFont("Helvetica", 10)
-                    p.setFillColorRGB(*dark_gray)
-                    p.drawString(72, y, "Type distribution chart not available.")
-                    y -= 20
 
-            # ANALYSIS charts (per-type averages)
-            if inc_analysis:
-                per_type_avgs = (summary or {}).get('per_type_averages', {}) or {}
-                if analysis_mode == 'all':
-                    params_to_draw = ['Flowrate', 'Pressure', 'Temperature']
-                else:
-                    params_to_draw = ['Flowrate', 'Pressure', 'Temperature']
-
-                if not per_type_avgs:
-                    if y < 200:
-                        p.showPage()
-                        y = height - 50
-                    y = draw_section_header(p, "Parameter Analysis", y)
+                try:
+                    buf_img = future.result()
+                    if buf_img is None:
+                        y = draw_chart_placeholder(p, 72, y, width - 144, data_dict)
+                        continue
+                    img = ImageReader(buf_img)
+                    img_w = width - 144
+                    img_h = 280
+                    p.drawImage(
+                        img,
+                        72,
+                        y - img_h,
+                        width=img_w,
+                        height=img_h
+                    )
+                    y -= (img_h + 20)
+                except Exception:
+                    logger.exception(
+                        "Failed to render analysis chart for %s", param
+                    )
                     p.setFont("Helvetica", 10)
-                    p.setFillColorRGB(*dark_gray)
+                    p.setFillColorRGB(220/255, 53/255, 69/255)
                     p.drawString(
-                        72, y,
-                        "Per-type averages not available for this dataset."
+                        72,
+                        y,
+                        f"Failed to draw analysis chart for {param}."
                     )
                     y -= 20
-                else:
-                    for param in params_to_draw:
-                        data_dict = per_type_avgs.get(param, {}) or {}
-                        if not data_dict:
-                            continue
-
-                        if y < 350:
-                            p.showPage()
-                            y = height - 50
-
-                        y = draw_section_header(
-                            p, f"Analysis - Average {param} by Type", y
-                        )
-
-                        try:
-                            buf_img = io.BytesIO()
-                            plt.figure(figsize=(7, 4), dpi=100)
-                            labels = list(data_dict.keys())
-                            vals = [
-                                data_dict[k] if data_dict[k] is not None else 0
-                                for k in labels
-                            ]
-
-                            param_chart_type = (
-                                analysis_chart_types.get(param, 'bar')
-                                if isinstance(analysis_chart_types, dict)
-                                else 'bar'
-                            )
-
-                            if param_chart_type == 'bar':
-                                plt.bar(
-                                    labels,
-                                    vals,
-                                    color='#007bff',
-                                    edgecolor='#0056b3',
-                                    linewidth=1.5
-                                )
-                            elif param_chart_type == 'pie':
-                                if sum(vals) == 0:
-                                    plt.bar(labels, vals)
-                                else:
-                                    colors = [
-                                        '#FF6B6B',
-                                        '#4ECDC4',
-                                        '#45B7D1',
-                                        '#FFA07A',
-                                        '#98D8C8'
-                                    ]
-                                    plt.pie(
-                                        vals,
-                                        labels=None,
-                                        autopct='%1.1f%%',
-                                        startangle=90,
-                                        colors=colors[:len(vals)]
-                                    )
-                                    plt.legend(
-                                        labels,
-                                        loc="center left",
-                                        bbox_to_anchor=(1.0, 0.5),
-                                        fontsize=9
-                                    )
-                                    plt.axis('equal')
-                            elif param_chart_type == 'line':
-                                plt.plot(
-                                    labels,
-                                    vals,
-                                    marker='o',
-                                    linewidth=2,
-                                    markersize=8,
-                                    color='#0056b3'
-                                )
-                                plt.fill_between(
-                                    range(len(labels)),
-                                    vals,
-                                    alpha=0.3,
-                                    color='#007bff'
-                                )
-                            elif param_chart_type == 'hist':
-                                plt.hist(
-                                    vals,
-                                    bins=min(10, max(1, len(vals))),
-                                    edgecolor='black',
-                                    color='#FF6B6B'
-                                )
-                            else:
-                                plt.bar(
-                                    labels,
-                                    vals,
-                                    color='#007bff',
-                                    edgecolor='#0056b3',
-                                    linewidth=1.5
-                                )
-
-                            plt.title(
-                                f'Average {param} by Equipment Type',
-                                fontsize=12,
-                                fontweight='bold',
-                                pad=15
-                            )
-                            plt.ylabel(param, fontsize=10, fontweight='bold')
-                            plt.xlabel('Equipment Type', fontsize=10, fontweight='bold')
-                            plt.xticks(
-                                rotation=45,
-                                ha='right',
-                                fontsize=9
-                            )
-                            plt.grid(axis='y', alpha=0.3, linestyle='--')
-                            plt.tight_layout(pad=0.5)
-                            plt.savefig(
-                                buf_img,
-                                format='png',
-                                bbox_inches='tight',
-                                pad_inches=0.15,
-                                dpi=100
-                            )
-                            plt.close()
-                            buf_img.seek(0)
-
-                            img = ImageReader(buf_img)
-                            img_w = width - 144
-                            img_h = 280
-                            p.drawImage(
-                                img,
-                                72,
-                                y - img_h,
-                                width=img_w,
-                                height=img_h
-                            )
-                            y -= (img_h + 20)
-                        except Exception:
-                            logger.exception(
-                                "Failed to render analysis chart for %s", param
-                            )
-                            p.setFont("Helvetica", 10)
-                            p.setFillColorRGB(220/255, 53/255, 69/255)
-                            p.drawString(
-                                72,
-                                y,
-                                f"Failed to draw analysis chart for {param}."
-                            )
-                            y -= 20
-
-            # PREVIEW rows
-            if inc_preview and preview_rows:
-                if y < 250:
+
+    # PREVIEW rows
+    if inc_preview and preview_rows:
+        if y < 250:
+            p.showPage()
+            y = height - 50
+
+        y = draw_section_header(p, "Data Preview", y)
+
+        p.setFont("Helvetica", 9)
+        p.setFillColorRGB(*dark_gray)
+        cols = list(preview_rows[0].keys()) if preview_rows else []
+
+        if cols:
+            p.setFillColorRGB(*light_gray)
+            p.rect(72, y - 18, width - 144, 18, fill=1, stroke=0)
+
+            col_width = (width - 144) / max(1, len(cols))
+            # text x offsets and truncated cell strings, computed once up front
+            col_x = [72 + 4 + i * col_width for i in range(len(cols))]
+            cells = [
+                [str(row.get(col, ""))[:12] for col in cols]
+                for row in preview_rows[:10]
+            ]
+            to = p.beginText()
+            to.setFont("Helvetica-Bold", 9)
+            to.setFillColorRGB(*dark_gray)
+            for x, col in zip(col_x, cols):
+                to.setTextOrigin(x, y - 12)
+                to.textOut(str(col)[:12])
+            p.drawText(to)
+            y -= 20
+
+            for row_count, texts in enumerate(cells):
+                if y < 100:
                     p.showPage()
                     y = height - 50
 
-                y = draw_section_header(p, "Data Preview", y)
+                if row_count % 2 == 0:
+                    p.setFillColorRGB(245/255, 248/255, 250/255)
+                    p.rect(72, y - 14, width - 144, 14, fill=1, stroke=0)
 
-                p.setFont("Helvetica", 9)
-                p.setFillColorRGB(*dark_gray)
-                cols = list(preview_rows[0].keys()) if preview_rows else []
+                to = p.beginText()
+                to.setFont("Helvetica", 8)
+                to.setFillColorRGB(*dark_gray)
+                for x, text in zip(col_x, texts):
+                    to.setTextOrigin(x, y - 10)
+                    to.textOut(text)
+                p.drawText(to)
 
-                if cols:
-                    p.setFillColorRGB(*light_gray)
-                    p.rect(72, y - 18, width - 144, 18, fill=1, stroke=0)
+                y -= 14
+        else:
+            p.drawString(72, y, "No data available.")
+            y -= 20
 
-                    p.setFont("Helvetica-Bold", 9)
-                    p.setFillColorRGB(*dark_gray)
-                    col_width = (width - 144) / max(1, len(cols))
-                    x = 72
-                    for col in cols:
-                        p.drawString(x + 4, y - 12, str(col)[:12])
-                        x += col_width
-                    y -= 20
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
 
-                    p.setFont("Helvetica", 8)
-                    row_count = 0
-                    for row in preview_rows[:10]:
-                        if y < 100:
-                            p.showPage()
-                            y = height - 50
-
-                        if row_count % 2 == 0:
-                            p.setFillColorRGB(245/255, 248/255, 250/255)
-                            p.rect(72, y - 14, width - 144, 14, fill=1, stroke=0)
-
-                        p.setFillColorRGB(*dark_gray)
-                        x = 72
-                        for col in cols:
-                            cell_val = str(row.get(col, ""))[:12]
-                            p.drawString(x + 4, y - 10, cell_val)
-                            x += col_width
-
-                        y -= 14
-                        row_count += 1
-                else:
-                    p.drawString(72, y, "No data available.")
-                    y -= 20
 
-            p.showPage()
-            p.save()
-            buffer.seek(0)
+class ReportFromSummaryView(APIView):
+    """
+    POST /api/report-from-summary/
+    Accepts a summary + preview_rows + include options and returns a generated PDF.
+    With ?async=1 the PDF is built by a background worker instead: responds
+    202 with a job_id to poll at /api/report-status/<job_id>/.
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+    def post(self, request, format=None):
+        data = request.data or {}
+        filename = data.get("filename") or "report.pdf"
+        username = getattr(request.user, "username", "user")
 
+        if request.GET.get('async') in ('1', 'true', 'yes'):
+            return start_report_job(
+                request, run_summary_report_job, data, username, filename=filename
+            )
+
+        try:
+            pdf = build_summary_report(data, username=username)
         except Exception:
             logger.exception("Failed to generate ad-hoc PDF")
             return Response(
                 {'detail': 'Failed to generate PDF (server).'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -7,8 +7,22 @@ Dependencies:
 
 import sys
 import io
+import os
+import uuid
+import json
+import time
+import base64
+import functools
+import hashlib
+import shutil
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from operator import itemgetter
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # safe backend when saving figures to files
 from matplotlib.figure import Figure
@@ -16,23 +30,152 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QLineEdit, QFileDialog, QTableWidget, QTableWidgetItem, QGroupBox,
-    QTextEdit, QComboBox, QListWidget, QMessageBox, QSizePolicy, QTabWidget,
+    QPlainTextEdit, QComboBox, QListWidget, QMessageBox, QSizePolicy, QTabWidget,
     QScrollArea, QFrame, QGridLayout, QSplitter, QToolButton, QMenu, QAction, QDialog, QFormLayout
 )
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from datetime import datetime
-from PIL import Image
 import traceback
+try:
+    import orjson  # optional, faster JSON decoding of API responses
+except ImportError:
+    orjson = None
 
 API_BASE_DEFAULT = "http://127.0.0.1:8000"
+# requests timeouts are (connect, read): fail fast on an unreachable server,
+# while still giving slow endpoints (uploads, reports) their full read time
+CONNECT_TIMEOUT = 3.05
+
+# Resolution of the chart PNGs embedded in PDFs: charts are placed 6.5in wide,
+# so 150 DPI (~975 px) is print quality without rasterizing extra pixels
+PDF_CHART_DPI = 150
+
+# Chart PNGs only live long enough to be embedded in a PDF: encode them with
+# fast, light zlib compression (identical pixels, a fraction of the encode time)
+PNG_PIL_KWARGS = {'compress_level': 1, 'optimize': False}
+
+# after the history list loads, the newest few summaries are fetched in the
+# background so clicking them needs no round trip; at most SUMMARY_CACHE_SIZE
+# responses are kept (least recently used dropped first)
+PREFETCH_SUMMARIES = 5
+SUMMARY_CACHE_SIZE = 32
+
+# pandas is only needed once a preview table is shown; importing it lazily keeps
+# it (the slowest import here) off the startup path. Use _pandas() to get it.
+pd = None
+
+def _pandas():
+    global pd
+    if pd is None:
+        import pandas
+        pd = pandas
+    return pd
 
 # ------------------------- helpers -------------------------
+def response_json(r):
+    """Decoded JSON body of a requests response (orjson when installed, else r.json())."""
+    if orjson is not None:
+        return orjson.loads(r.content)
+    return r.json()
+
+def jwt_expiry(token):
+    """``exp`` claim (epoch seconds) of a JWT, or None if it can't be read. The signature is not checked."""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return None
+
+class AuthSession(requests.Session):
+    """
+    requests.Session that sends the JWT access token on every request and keeps it
+    fresh: a token about to expire is refreshed before the request goes out, and a
+    401 triggers one refresh + replay of the request. Safe to use from worker
+    threads (no UI access; refreshes are serialized by a lock).
+    """
+    REFRESH_MARGIN = 30  # seconds before expiry at which the token is refreshed up front
+
+    def __init__(self):
+        super().__init__()
+        self.refresh_token = None
+        self.refresh_url = None
+        self._access_token = None
+        self._access_exp = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def access_token(self):
+        return self._access_token
+
+    @access_token.setter
+    def access_token(self, token):
+        self._access_token = token
+        self._access_exp = jwt_expiry(token) if token else None
+        if token:
+            self.headers['Authorization'] = f"Bearer {token}"
+        else:
+            self.headers.pop('Authorization', None)
+
+    def refresh_access_token(self, stale_token=None):
+        """
+        Exchange the refresh token for a new access token. Returns the token
+        response, or None if there is nothing to refresh with. When ``stale_token``
+        is given and another thread already replaced it, no request is made.
+        """
+        with self._refresh_lock:
+            if not (self.refresh_token and self.refresh_url):
+                return None
+            if stale_token is not None and self._access_token != stale_token:
+                return None
+            r = self.post(self.refresh_url, json={"refresh": self.refresh_token},
+                          headers={'Authorization': None}, timeout=(CONNECT_TIMEOUT, 12))
+            if r.status_code == 200:
+                data = response_json(r)
+                self.access_token = data.get("access")
+                self.refresh_token = data.get("refresh") or self.refresh_token
+            return r
+
+    def send(self, request, **kwargs):
+        sent_token = self._access_token
+        authed = sent_token is not None and request.headers.get('Authorization') == f"Bearer {sent_token}"
+        if authed and self._access_exp is not None and self._access_exp - time.time() < self.REFRESH_MARGIN:
+            self.refresh_access_token(stale_token=sent_token)
+            sent_token = self._access_token
+            request.headers['Authorization'] = f"Bearer {sent_token}"
+
+        r = super().send(request, **kwargs)
+
+        # a streamed (file-like) body has been consumed and can't be replayed
+        replayable = not hasattr(request.body, 'read')
+        if (r.status_code == 401 and authed and replayable and self.refresh_token
+                and not request.headers.get('X-Retried')):
+            self.refresh_access_token(stale_token=sent_token)
+            if self._access_token and self._access_token != sent_token:
+                retry = request.copy()
+                retry.headers['Authorization'] = f"Bearer {self._access_token}"
+                retry.headers['X-Retried'] = '1'
+                r.close()
+                return super().send(retry, **kwargs)
+        return r
+
+def make_api_session():
+    """
+    Keep-alive AuthSession for the backend API. Failed connects are retried for
+    every request (nothing was sent yet); read errors and gateway errors only for
+    idempotent ones, so an upload is never posted twice. Retries back off
+    briefly, and the last response is still returned (not raised) so callers
+    keep reporting the status code.
+    """
+    session = AuthSession()
+    retry = Retry(total=3, connect=3, read=2, status=2, backoff_factor=0.3,
+                  status_forcelist=[502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+@functools.lru_cache(maxsize=1024)
 def safe_label(s: str, max_len=20):
     if s is None:
         return ""
@@ -41,11 +184,58 @@ def safe_label(s: str, max_len=20):
         return s
     return s[:max_len-3] + "..."
 
-def use_constrained_layout(fig: Figure):
-    try:
-        fig.set_constrained_layout(True)
-    except Exception:
-        pass
+def split_values(values_dict):
+    """
+    Split a {label: value} mapping into (labels, values) in one pass; values come
+    back as a float64 array with missing entries (None) plotted as 0.
+    """
+    if not values_dict:
+        return [], np.zeros(0, dtype=np.float64)
+    labels, raw = zip(*values_dict.items())
+    vals = np.fromiter((0.0 if v is None else float(v) for v in raw),
+                       dtype=np.float64, count=len(raw))
+    return list(labels), vals
+
+def reset_axes(ax):
+    """
+    Clear a single-Axes figure for a new chart while keeping the Axes object.
+    cla() leaves a few things behind that a fresh subplot wouldn't have: the
+    pie's equal aspect and hidden frame, tick label sizes/rotation, stale data
+    limits and the margins/position chosen by the previous tight_layout().
+    """
+    fig = ax.figure
+    ax.cla()
+    ax.relim()
+    ax.set_aspect('auto', adjustable='box')
+    ax.set_frame_on(True)
+    for axis in ('x', 'y'):
+        ax.tick_params(axis=axis, rotation=0,
+                       labelsize=matplotlib.rcParams[f'{axis}tick.labelsize'])
+    fig.subplotpars.update(**{k: matplotlib.rcParams[f'figure.subplot.{k}']
+                              for k in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+    ax.set_position(ax.get_subplotspec().get_position(fig))
+    ax.set_in_layout(True)  # set_position() opts the Axes out of layout engines
+
+def category_bars(ax, labels, vals, horizontal=False):
+    """
+    Bar chart over integer positions with ``labels`` set as fixed tick labels.
+    Same picture as passing the strings to bar()/barh(), without matplotlib's
+    categorical-axis conversion (which would also merge duplicate labels).
+    """
+    pos = np.arange(len(labels))
+    bars = ax.barh(pos, vals) if horizontal else ax.bar(pos, vals)
+    if len(labels):  # no labels: keep the default empty axis ticks
+        (ax.set_yticks if horizontal else ax.set_xticks)(pos, labels)
+    return bars
+
+def hist_bars(ax, vals, **bar_kwargs):
+    """
+    Histogram of ``vals`` drawn as precomputed bars: NumPy does the binning,
+    Matplotlib only draws one bar per bin.
+    """
+    vals = np.asarray(vals, dtype=np.float64)
+    counts, edges = np.histogram(vals, bins=min(10, max(1, vals.size)))
+    return ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **bar_kwargs)
 
 def _annotate_bars(ax, vals, use_hbar):
     """
@@ -55,22 +245,31 @@ def _annotate_bars(ax, vals, use_hbar):
     Avoid overlap with chart boundary by adding headroom.
     """
     try:
-        nums = [v for v in vals if isinstance(v, (int, float))]
-        max_val = max(nums) if nums else 0.0
-        inside_frac = 0.12 if max_val > 0 else 0.2
-
         patches = ax.patches
         if not patches:
             return
 
+        nums = np.array([v for v in vals if isinstance(v, (int, float))], dtype=float)
+        nums = nums[~np.isnan(nums)]
+        max_val = float(nums.max()) if nums.size else 0.0
+        inside_frac = 0.12 if max_val > 0 else 0.2
+        headroom = max_val * 0.12 if max_val > 0 else 1.0
+
+        # bar lengths and label anchors for all bars at once; the mask picks
+        # which labels go inside (white) vs. just outside (black) the bar
+        if use_hbar:
+            sizes = np.array([bar.get_width() or 0 for bar in patches], dtype=float)
+            centers = np.array([bar.get_y() + bar.get_height() / 2 for bar in patches])
+        else:
+            sizes = np.array([bar.get_height() or 0 for bar in patches], dtype=float)
+            centers = np.array([bar.get_x() + bar.get_width() / 2 for bar in patches])
+        inside = (sizes >= inside_frac * max_val) if max_val > 0 else np.zeros(len(sizes), dtype=bool)
+
         if use_hbar:
-            headroom = max_val * 0.12 if max_val > 0 else 1.0
             left, right = ax.get_xlim()
             ax.set_xlim(0, max(max_val + headroom, right))
-            for bar in patches:
-                w = bar.get_width() or 0
-                y = bar.get_y() + bar.get_height() / 2
-                if max_val > 0 and w >= inside_frac * max_val:
+            for w, y, is_inside in zip(sizes.tolist(), centers.tolist(), inside.tolist()):
+                if is_inside:
                     ax.annotate(f'{w:.2f}',
                                 xy=(w * 0.98, y),
                                 xytext=(0, 0),
@@ -85,13 +284,10 @@ def _annotate_bars(ax, vals, use_hbar):
                                 ha='left', va='center',
                                 fontsize=8, color='black')
         else:
-            headroom = max_val * 0.12 if max_val > 0 else 1.0
             bottom, top = ax.get_ylim()
             ax.set_ylim(0, max(max_val + headroom, top))
-            for bar in patches:
-                h = bar.get_height() or 0
-                x = bar.get_x() + bar.get_width() / 2
-                if max_val > 0 and h >= inside_frac * max_val:
+            for h, x, is_inside in zip(sizes.tolist(), centers.tolist(), inside.tolist()):
+                if is_inside:
                     ax.annotate(f'{h:.2f}',
                                 xy=(x, h * 0.98),
                                 xytext=(0, 0),
@@ -108,99 +304,166 @@ def _annotate_bars(ax, vals, use_hbar):
     except Exception:
         pass
 
-# create PNG bytes from values_dict for embedding
-def create_plot_image(param_name, values_dict, chart_type='bar',
-                      width_inches=8, height_inches=4, dpi=200, logger_fn=None):
-    buf = io.BytesIO()
-    try:
+# PDF charts are rendered on this long-lived pool; its threads outlive a single
+# export, so each keeps one reusable Figure (at most max_workers of them)
+_chart_render_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pdf-chart')
+_FIG_POOL = threading.local()
+
+def _reusable_figure(width_inches, height_inches, dpi):
+    """Return this thread's Figure, cleared and resized, creating it on first use."""
+    fig = getattr(_FIG_POOL, 'fig', None)
+    if fig is None:
         fig = Figure(figsize=(width_inches, height_inches), dpi=dpi)
-        use_constrained_layout(fig)
+        FigureCanvasAgg(fig)  # headless: save through Agg directly, no canvas switch per savefig
+        _FIG_POOL.fig = fig
+    else:
+        fig.clear()
+        fig.set_size_inches(width_inches, height_inches)
+        fig.set_dpi(dpi)
+    return fig
+
+# 1x1 light-grey PNG, used if even the placeholder chart can't be rendered
+_BLANK_PNG = (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x00\x00\x00\x00:~\x9bU'
+              b'\x00\x00\x00\nIDATx\x9ccx\x07\x00\x00\xf0\x00\xef\xf0i.\xa1\x00\x00\x00\x00IEND\xaeB`\x82')
+
+@functools.lru_cache(maxsize=None)
+def _placeholder_png(message="Chart unavailable"):
+    """PNG bytes shown in place of a chart that failed to render or has no data (rendered once per message)."""
+    try:
+        buf = io.BytesIO()
+        fig = Figure(figsize=(6,3), dpi=100)
+        FigureCanvasAgg(fig)
         ax = fig.add_subplot(111)
+        ax.text(0.5, 0.5, message, ha='center', va='center')
+        ax.axis('off')
+        fig.savefig(buf, format='png', pil_kwargs=PNG_PIL_KWARGS)
+        return buf.getvalue()
+    except Exception:
+        return _BLANK_PNG
 
-        labels = list(values_dict.keys()) if values_dict else []
-        vals = [values_dict.get(k, 0) or 0 for k in labels]
-        labels_short = [safe_label(l, max_len=20) for l in labels]
-
-        n = max(1, len(labels_short))
-        use_hbar = n >= 8
-        if n <= 6:
-            rot = 0; label_fs = 10
-        elif n <= 12:
-            rot = 30; label_fs = 9
-        else:
-            rot = 0; label_fs = 9
-
-        if chart_type == 'bar':
-            if use_hbar:
-                ax.barh(labels_short, vals)
-                ax.invert_yaxis()
-                _annotate_bars(ax, vals, use_hbar=True)
-            else:
-                ax.bar(labels_short, vals)
-                _annotate_bars(ax, vals, use_hbar=False)
-            ax.set_ylabel(param_name)
-        elif chart_type == 'line':
-            ax.plot(labels_short, vals, marker='o', linestyle='-')
-            ax.set_ylabel(param_name)
-        elif chart_type == 'pie':
-            if sum(vals) == 0:
-                ax.text(0.5, 0.5, 'No data', ha='center', va='center')
-            else:
-                wedges, texts, autotexts = ax.pie(vals, labels=None, autopct='%1.0f%%', startangle=90)
-                ax.axis('equal')
-                ax.legend(wedges, labels_short, title="Type", loc="center left", bbox_to_anchor=(1.02, 0.5), fontsize=8)
-        elif chart_type == 'hist':
-            nums = [v for v in vals if v is not None]
-            if nums:
-                ax.hist(nums, bins=min(10, max(1, len(nums))), edgecolor='black')
-                ax.set_xlabel('Value')
-                ax.set_ylabel('Frequency')
-            else:
-                ax.text(0.5, 0.5, 'No numeric data', ha='center', va='center')
+# create PNG bytes from values_dict for embedding
+@functools.lru_cache(maxsize=128)
+def _render_png_bytes(param_name, items, chart_type, width_inches, height_inches, dpi):
+    """
+    Render the chart for (label, value) pairs ``items`` and return PNG bytes.
+    Cached on all arguments; exceptions propagate (and are not cached).
+    """
+    values_dict = dict(items)
+    buf = io.BytesIO()
+    fig = _reusable_figure(width_inches, height_inches, dpi)
+    ax = fig.add_subplot(111)
+
+    labels, vals = split_values(values_dict)
+    labels_short = [safe_label(l, max_len=20) for l in labels]
+
+    n = max(1, len(labels_short))
+    use_hbar = n >= 8
+    if n <= 6:
+        rot = 0; label_fs = 10
+    elif n <= 12:
+        rot = 30; label_fs = 9
+    else:
+        rot = 0; label_fs = 9
+
+    if chart_type == 'bar':
+        if use_hbar:
+            category_bars(ax, labels_short, vals, horizontal=True)
+            ax.invert_yaxis()
+            _annotate_bars(ax, vals, use_hbar=True)
         else:
-            ax.bar(labels_short, vals)
+            category_bars(ax, labels_short, vals)
             _annotate_bars(ax, vals, use_hbar=False)
-
-        ax.set_title(f'{param_name}', fontsize=11)
-        if not use_hbar:
-            ax.tick_params(axis='x', rotation=rot, labelsize=label_fs)
+        ax.set_ylabel(param_name)
+    elif chart_type == 'line':
+        ax.plot(labels_short, vals, marker='o', linestyle='-')
+        ax.set_ylabel(param_name)
+    elif chart_type == 'pie':
+        if vals.sum() == 0:
+            ax.text(0.5, 0.5, 'No data', ha='center', va='center')
         else:
-            ax.tick_params(axis='y', labelsize=label_fs)
-        try:
-            fig.tight_layout(pad=0.6)
-        except Exception:
-            pass
+            wedges, texts, autotexts = ax.pie(vals, labels=None, autopct='%1.0f%%', startangle=90)
+            ax.axis('equal')
+            ax.legend(wedges, labels_short, title="Type", loc="center left", bbox_to_anchor=(1.02, 0.5), fontsize=8)
+    elif chart_type == 'hist':
+        if vals.size:
+            hist_bars(ax, vals, edgecolor='black')
+            ax.set_xlabel('Value')
+            ax.set_ylabel('Frequency')
+        else:
+            ax.text(0.5, 0.5, 'No numeric data', ha='center', va='center')
+    else:
+        category_bars(ax, labels_short, vals)
+        _annotate_bars(ax, vals, use_hbar=False)
+
+    ax.set_title(f'{param_name}', fontsize=11)
+    if not use_hbar:
+        ax.tick_params(axis='x', rotation=rot, labelsize=label_fs)
+    else:
+        ax.tick_params(axis='y', labelsize=label_fs)
+    try:
+        fig.tight_layout(pad=0.6)
+    except Exception:
+        pass
+
+    fig.savefig(buf, format='png', dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
+    if buf.getbuffer().nbytes == 0:
+        return _placeholder_png()
+    return buf.getvalue()
 
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
-        buf.seek(0)
-        if buf.getbuffer().nbytes == 0:
-            buf = io.BytesIO()
-            fig2 = Figure(figsize=(6,3), dpi=dpi)
-            ax2 = fig2.add_subplot(111)
-            ax2.text(0.5, 0.5, "No chart (placeholder)", ha='center', va='center')
-            ax2.axis('off')
-            fig2.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
-            buf.seek(0)
-        return buf
+def create_plot_image(param_name, values_dict, chart_type='bar',
+                      width_inches=8, height_inches=4, dpi=PDF_CHART_DPI, logger_fn=None):
+    """
+    Return a BytesIO with the chart PNG. Renders are cached (see _render_png_bytes),
+    so regenerating a PDF or re-selecting a chart type skips Matplotlib entirely.
+    """
+    if not values_dict or all(v is None for v in values_dict.values()):
+        return io.BytesIO(_placeholder_png("No data"))
+    try:
+        png = _render_png_bytes(param_name, tuple(values_dict.items()), chart_type,
+                                width_inches, height_inches, dpi)
+        return io.BytesIO(png)
     except Exception as e:
         if logger_fn:
             try: logger_fn(f"create_plot_image exception for {param_name}: {e}")
             except Exception: pass
-        buf = io.BytesIO()
-        try:
-            fig = Figure(figsize=(6,3), dpi=dpi)
-            ax = fig.add_subplot(111)
-            ax.text(0.5, 0.5, f'Error creating chart: {e}', ha='center', va='center')
-            ax.axis('off')
-            fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
-            buf.seek(0)
-            return buf
-        except Exception:
-            buf.write(b'\x89PNG\r\n\x1a\n')
-            buf.seek(0)
-            return buf
+        return io.BytesIO(_placeholder_png())
 
 # ---------- nicer PDF generator (Platypus) ----------
+# ReportLab is imported on first export rather than at startup, so launching the
+# app doesn't pay for it when no PDF is ever generated.
+@functools.lru_cache(maxsize=None)
+def _draw_once_image_class():
+    from reportlab.platypus import Image as RLImage
+
+    class _DrawOnceImage(RLImage):
+        """
+        Platypus Image that releases its decoded bitmap and PNG buffer as soon as it
+        has been drawn, so only the image being placed is held in memory during build().
+        """
+        def draw(self):
+            try:
+                super().draw()
+            finally:
+                self.__dict__.pop('_img', None)
+                src = self.__dict__.pop('_file', None)
+                if hasattr(src, 'close'):
+                    src.close()
+
+    return _DrawOnceImage
+
+@functools.lru_cache(maxsize=None)
+def _pdf_styles():
+    """Report stylesheet, built once; the styles are only read while building a PDF."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='HeadingLarge', fontSize=16, leading=18, spaceAfter=6, spaceBefore=6))
+    styles.add(ParagraphStyle(name='HeadingSmall', fontSize=11, leading=13, spaceAfter=4, textColor=colors.HexColor('#333333')))
+    styles.add(ParagraphStyle(name='MonoSmall', fontName='Helvetica', fontSize=9, leading=11))
+    styles.add(ParagraphStyle(name='Block', fontSize=10, leading=12, backColor=colors.whitesmoke, borderPadding=6, spaceAfter=6))
+    return styles
+
 def generate_nice_pdf(path,
                       summary,
                       preview_rows,
@@ -223,11 +486,14 @@ def generate_nice_pdf(path,
     if analysis_chart_types is None:
         analysis_chart_types = {}
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='HeadingLarge', fontSize=16, leading=18, spaceAfter=6, spaceBefore=6))
-    styles.add(ParagraphStyle(name='HeadingSmall', fontSize=11, leading=13, spaceAfter=4, textColor=colors.HexColor('#333333')))
-    styles.add(ParagraphStyle(name='MonoSmall', fontName='Helvetica', fontSize=9, leading=11))
-    styles.add(ParagraphStyle(name='Block', fontSize=10, leading=12, backColor=colors.whitesmoke, borderPadding=6, spaceAfter=6))
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    _DrawOnceImage = _draw_once_image_class()
+
+    styles = _pdf_styles()
 
     doc = SimpleDocTemplate(path, pagesize=letter,
                             rightMargin=48, leftMargin=48, topMargin=48, bottomMargin=48)
@@ -236,7 +502,7 @@ def generate_nice_pdf(path,
     # Header
     title = Paragraph("Chemical Equipment Report", styles['HeadingLarge'])
     meta_lines = []
-    meta_lines.append(f"Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    meta_lines.append(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     if dataset_id:
         meta_lines.append(f"Dataset ID: {dataset_id}")
     meta = Paragraph("<br/>".join(meta_lines), styles['MonoSmall'])
@@ -291,14 +557,47 @@ def generate_nice_pdf(path,
             flow.append(avg_table)
             flow.append(Spacer(1, 10))
 
+    # Render every chart up front in parallel (each render uses its own Figure);
+    # the flow below embeds them in order. Worker threads must not touch Qt, so
+    # their log messages are collected and passed to logger_fn afterwards.
+    # parameters with data, in display order (parameters without data get no section)
+    analysis_items = []
+    if include_analysis and summary:
+        per_type_avgs = summary.get('per_type_averages', {}) or {}
+        for param in (analysis_params_order or []):
+            data_dict = per_type_avgs.get(param, {}) or {}
+            if data_dict:
+                analysis_items.append((param, data_dict))
+
+    chart_jobs = {}
+    if summary and create_plot_image_fn:
+        td = summary.get('type_distribution', {}) or {}
+        if include_type_chart and td:
+            chart_jobs[None] = ('Type distribution', td, overview_chart_choice, 3.0)
+        for param, data_dict in analysis_items:
+            chart_jobs[param] = (f"{param} (avg by type)", data_dict,
+                                 analysis_chart_types.get(param, 'bar'), 2.6)
+    render_logs = []
+    chart_futures = {}
+    if chart_jobs:
+        for key, (label, data, chart_type, height_inches) in chart_jobs.items():
+            chart_futures[key] = _chart_render_pool.submit(
+                create_plot_image_fn, label, data, chart_type=chart_type, width_inches=6.5,
+                height_inches=height_inches, dpi=PDF_CHART_DPI,
+                logger_fn=render_logs.append if logger_fn else None)
+        wait(chart_futures.values())
+    if logger_fn:
+        for msg in render_logs:
+            logger_fn(msg)
+
     # Type distribution chart
     if include_type_chart and summary:
         td = summary.get('type_distribution', {}) or {}
         if td and create_plot_image_fn:
             try:
-                img_buf = create_plot_image_fn('Type distribution', td, chart_type=overview_chart_choice, width_inches=6.5, height_inches=3.0, dpi=200, logger_fn=logger_fn)
+                img_buf = chart_futures[None].result()
                 img_buf.seek(0)
-                rl_img = RLImage(img_buf, width=6.5*inch, height=3.0*inch)
+                rl_img = _DrawOnceImage(img_buf, width=6.5*inch, height=3.0*inch)
                 flow.append(Paragraph("Type distribution", styles['HeadingSmall']))
                 flow.append(rl_img)
                 flow.append(Spacer(1, 12))
@@ -309,26 +608,20 @@ def generate_nice_pdf(path,
                 flow.append(Spacer(1, 8))
 
     # Analysis charts (use provided analysis_chart_types)
-    if include_analysis and summary:
-        per_type_avgs = summary.get('per_type_averages', {}) or {}
-        for param in (analysis_params_order or []):
-            data_dict = per_type_avgs.get(param, {}) or {}
-            if not data_dict:
-                continue
-            flow.append(Paragraph(f"Analysis — {param}", styles['HeadingSmall']))
-            if create_plot_image_fn:
-                chart_type = analysis_chart_types.get(param, 'bar')
-                try:
-                    img_buf = create_plot_image_fn(f"{param} (avg by type)", data_dict, chart_type=chart_type, width_inches=6.5, height_inches=2.6, dpi=200, logger_fn=logger_fn)
-                    img_buf.seek(0)
-                    rl_img = RLImage(img_buf, width=6.5*inch, height=2.6*inch)
-                    flow.append(rl_img)
-                    flow.append(Spacer(1, 8))
-                except Exception as e:
-                    if logger_fn:
-                        logger_fn(f"Failed to render analysis chart for {param}: {e}")
-                    flow.append(Paragraph(f"Chart unavailable for {param}.", styles['MonoSmall']))
-                    flow.append(Spacer(1, 8))
+    for param, _ in analysis_items:
+        flow.append(Paragraph(f"Analysis — {param}", styles['HeadingSmall']))
+        if create_plot_image_fn:
+            try:
+                img_buf = chart_futures[param].result()
+                img_buf.seek(0)
+                rl_img = _DrawOnceImage(img_buf, width=6.5*inch, height=2.6*inch)
+                flow.append(rl_img)
+                flow.append(Spacer(1, 8))
+            except Exception as e:
+                if logger_fn:
+                    logger_fn(f"Failed to render analysis chart for {param}: {e}")
+                flow.append(Paragraph(f"Chart unavailable for {param}.", styles['MonoSmall']))
+                flow.append(Spacer(1, 8))
 
     # Preview rows table
     if include_preview and preview_rows:
@@ -336,14 +629,35 @@ def generate_nice_pdf(path,
         cols = list(preview_rows[0].keys())[:6]
         header = [Paragraph(f"<b>{c}</b>", styles['MonoSmall']) for c in cols]
         data = [header]
+        col_width = doc.width / max(1, len(cols))
+        # plain strings are drawn directly in the table font; only cells that
+        # need wrapping or contain markup pay for a Paragraph
+        max_text_width = col_width - 12  # default 6pt left/right cell padding
+        getter = itemgetter(*cols)
         for r in preview_rows[:8]:
-            row = [Paragraph(str(r.get(c, '')), styles['MonoSmall']) for c in cols]
+            try:
+                values = getter(r)
+            except KeyError:  # ragged row: fall back to per-column defaults
+                values = tuple(r.get(c, '') for c in cols)
+            if len(cols) == 1:
+                values = (values,)
+            row = []
+            for v in values:
+                text = str(v)
+                if ('<' in text or '&' in text
+                        or stringWidth(text, 'Helvetica', 9) > max_text_width):
+                    row.append(Paragraph(text, styles['MonoSmall']))
+                else:
+                    row.append(text)
             data.append(row)
-        preview_table = Table(data, colWidths=[(doc.width / max(1, len(cols))) for _ in cols])
+        preview_table = Table(data, colWidths=[col_width for _ in cols])
         preview_table.setStyle(TableStyle([
             ('GRID', (0,0), (-1,-1), 0.25, colors.HexColor('#e6e6e6')),
             ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f7f9fc')),
             ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
+            ('FONTSIZE', (0,1), (-1,-1), 9),
+            ('LEADING', (0,1), (-1,-1), 11),
         ]))
         flow.append(preview_table)
         flow.append(Spacer(1, 8))
@@ -357,10 +671,72 @@ def generate_nice_pdf(path,
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=9, height=4, dpi=100):
         fig = Figure(figsize=(width, height), dpi=dpi)
-        use_constrained_layout(fig)
         self.ax = fig.add_subplot(111)
         super().__init__(fig)
 
+class MultipartFileBody:
+    """
+    multipart/form-data body for a single file field that streams the file from
+    disk while it is sent. Passing ``files=`` to requests reads the whole file into
+    memory first; this object is handed to ``data=`` instead and read in chunks.
+    """
+    def __init__(self, field, filename, fh, content_type='application/octet-stream'):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        filename = filename.replace('"', '%22')
+        head = (f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('ascii')
+        file_size = os.fstat(fh.fileno()).st_size - fh.tell()
+        self._length = len(head) + file_size + len(tail)
+        self._parts = [io.BytesIO(head), fh, io.BytesIO(tail)]
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = b''.join(part.read() for part in self._parts)
+            self._parts = []
+            return data
+        chunks = []
+        while size > 0 and self._parts:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+class _WorkerSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(object)
+
+class NetWorker(QtCore.QRunnable):
+    """
+    Runs ``fn()`` on a QThreadPool thread. The result (or exception) is emitted
+    through ``signals.finished`` / ``signals.error``; the signals object lives in
+    the GUI thread, so connected slots run there and may touch widgets.
+    """
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            outcome, payload = 'error', e
+        else:
+            outcome, payload = 'finished', result
+        try:
+            getattr(self.signals, outcome).emit(payload)
+        except RuntimeError:
+            pass  # the app shut down (deleting the signals object) while we were running
+
 # ---------- ParameterCard ----------
 class ParameterCard(QWidget):
     def __init__(self, param_name, values_dict, on_remove_callback=None, canvas_size=(9.5,3.5)):
@@ -369,6 +745,8 @@ class ParameterCard(QWidget):
         self.values = values_dict or {}
         self.on_remove_callback = on_remove_callback
         self.canvas_size = canvas_size
+        self._last_render = None  # (chart_type, values) currently drawn on the canvas
+        self._dirty = False  # a render was skipped while hidden; done in showEvent
 
         outer = QVBoxLayout()
         header = QHBoxLayout()
@@ -381,7 +759,12 @@ class ParameterCard(QWidget):
         self.chart_select.addItems(['bar', 'line', 'pie', 'hist'])
         self.chart_select.setCurrentText('bar')
         self.chart_select.setToolTip("Change chart type for this parameter only")
-        self.chart_select.currentIndexChanged.connect(self.render_chart)
+        # scrolling through the chart types redraws once, for the last one picked
+        self._render_timer = QtCore.QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(60)
+        self._render_timer.timeout.connect(self.render_chart)
+        self.chart_select.currentIndexChanged.connect(lambda _: self._render_timer.start())
         header.addWidget(QLabel("Chart:"))
         header.addWidget(self.chart_select)
 
@@ -405,16 +788,29 @@ class ParameterCard(QWidget):
         self.values = values_dict or {}
         self.render_chart()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self.render_chart()
+
     def render_chart(self):
+        # hidden cards (Analysis tab not shown, removed cards) draw when shown again
+        if not self.isVisible():
+            self._dirty = True
+            return
+        self._dirty = False
+        chart_type = self.chart_select.currentText()
+        render_key = (chart_type, tuple(self.values.items()))
+        if render_key == self._last_render:
+            return
+        self._last_render = render_key
+
+        # reuse the card's Axes instead of rebuilding it with clf()/add_subplot()
         fig = self.canvas.figure
-        fig.clf()
-        use_constrained_layout(fig)
-        ax = fig.add_subplot(111)
-        self.canvas.ax = ax
+        ax = self.canvas.ax
+        reset_axes(ax)
 
-        chart_type = self.chart_select.currentText()
-        labels = list(self.values.keys())
-        vals = [self.values.get(k, 0) or 0 for k in labels]
+        labels, vals = split_values(self.values)
         labels_short = [safe_label(l, max_len=18) for l in labels]
 
         n_labels = max(1, len(labels_short))
@@ -429,18 +825,18 @@ class ParameterCard(QWidget):
         try:
             if chart_type == 'bar':
                 if use_hbar:
-                    ax.barh(labels_short, vals)
+                    category_bars(ax, labels_short, vals, horizontal=True)
                     ax.invert_yaxis()
                     _annotate_bars(ax, vals, use_hbar=True)
                 else:
-                    ax.bar(labels_short, vals)
+                    category_bars(ax, labels_short, vals)
                     _annotate_bars(ax, vals, use_hbar=False)
                 ax.set_ylabel(self.param)
             elif chart_type == 'line':
                 ax.plot(labels_short, vals, marker='o', linestyle='-')
                 ax.set_ylabel(self.param)
             elif chart_type == 'pie':
-                if sum(vals) == 0:
+                if vals.sum() == 0:
                     ax.text(0.5, 0.5, 'No data', ha='center', va='center')
                 else:
                     wedges, texts, autotexts = ax.pie(
@@ -450,15 +846,14 @@ class ParameterCard(QWidget):
                     ax.legend(wedges, labels_short, title="Type",
                               loc="center left", bbox_to_anchor=(1.02, 0.5), fontsize=8)
             elif chart_type == 'hist':
-                nums = [v for v in vals if v is not None]
-                if nums:
-                    ax.hist(nums, bins=min(10, max(1, len(nums))), edgecolor='black')
+                if vals.size:
+                    hist_bars(ax, vals, edgecolor='black')
                     ax.set_xlabel('Value')
                     ax.set_ylabel('Frequency')
                 else:
                     ax.text(0.5, 0.5, 'No numeric data', ha='center', va='center')
             else:
-                ax.bar(labels_short, vals)
+                category_bars(ax, labels_short, vals)
                 _annotate_bars(ax, vals, use_hbar=False)
 
             ax.set_title(f'Average {self.param} by Type', fontsize=10)
@@ -508,25 +903,49 @@ class LoginDialog(QDialog):
 
 # ---------- Main application ----------
 class DesktopApp(QWidget):
+    # emitted by log(); may come from worker threads, the flush always runs on the GUI thread
+    _log_posted = QtCore.pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Chemical Equipment Parameter Visualizer — Desktop")
         self.resize(1250, 820)
 
         # state
+        self._summary_cache = OrderedDict()  # dataset pk -> /api/summary/<pk>/ response, LRU order
+        self._prefetch_worker = None
+        self._saved_reports = {}  # report URL -> (ETag, Last-Modified, private cached copy)
+        self._report_cache_dir = os.path.join(
+            QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.CacheLocation), 'reports')
         self.api_base = API_BASE_DEFAULT
+        # one keep-alive session for all API calls (connections are reused);
+        # it also carries the Authorization header, see access_token below
+        self.session = make_api_session()
         self.access_token = None
         self.refresh_token = None
         self.current_summary = None
         self.current_preview = []
         self.current_dataset_id = None
         self.logged_in_username = None
+        self._net_workers = set()  # in-flight NetWorkers (kept referenced until they report back)
+        self._overview_render_key = None  # (chart_type, data) currently drawn on the overview canvas
+
+        # coalesce bursts of refresh requests (history clicks, combo changes) into one redraw
+        self._redraw_timer = QtCore.QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(50)
+        self._redraw_timer.timeout.connect(self._do_redraw)
+        self._overview_timer = QtCore.QTimer(self)
+        self._overview_timer.setSingleShot(True)
+        self._overview_timer.setInterval(30)
+        self._overview_timer.timeout.connect(self.render_overview_chart)
 
         # left sidebar widgets
         left_layout = QVBoxLayout()
         api_group = QGroupBox("Backend / Authentication")
         ag = QVBoxLayout()
         self.api_input = QLineEdit(self.api_base)
+        self.api_input.editingFinished.connect(lambda: setattr(self, 'api_base', self.api_input.text()))
 
         # login status label
         self.login_status_label = QLabel("Not logged in")
@@ -561,6 +980,12 @@ class DesktopApp(QWidget):
         upload_group.setLayout(up_layout)
         left_layout.addWidget(upload_group)
 
+        # shown while a request runs in the background
+        self.busy_label = QLabel("Working…")
+        self.busy_label.setStyleSheet("color: #666; font-style: italic;")
+        self.busy_label.hide()
+        left_layout.addWidget(self.busy_label)
+
         history_group = QGroupBox("History (last 5)")
         h_layout = QVBoxLayout()
         self.history_list = QListWidget()
@@ -575,9 +1000,22 @@ class DesktopApp(QWidget):
 
         status_group = QGroupBox("Status / Logs")
         s_layout = QVBoxLayout()
-        self.status_box = QTextEdit()
+        self.status_box = QPlainTextEdit()
         self.status_box.setReadOnly(True)
         self.status_box.setFixedHeight(160)
+        self.status_box.setMaximumBlockCount(2000)
+        # log lines are queued and written in batches (see log/_flush_log)
+        self._log_formats = {}
+        for level, color in (('info', '#000'), ('warn', '#b65a00'), ('error', '#b00'), ('success', '#080')):
+            fmt = QtGui.QTextCharFormat()
+            fmt.setForeground(QtGui.QColor(color))
+            self._log_formats[level] = fmt
+        self._log_queue = deque()
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_posted.connect(self._log_timer.start)
         s_layout.addWidget(self.status_box)
         status_group.setLayout(s_layout)
         left_layout.addWidget(status_group)
@@ -586,13 +1024,16 @@ class DesktopApp(QWidget):
         # Right content: tabs
         right_layout = QVBoxLayout()
         tabs = QTabWidget()
+        self.tabs = tabs
 
         # Overview tab
         overview_tab = QWidget()
+        self.overview_tab = overview_tab
         ov_layout = QVBoxLayout()
 
         self.kpi_row = QHBoxLayout()
         self.kpi_row.setSpacing(12)
+        self.kpi_values = {}  # KPI key -> value QLabel, created on the first summary
         ov_layout.addLayout(self.kpi_row)
 
         top_ctrl_row = QHBoxLayout()
@@ -605,6 +1046,7 @@ class DesktopApp(QWidget):
         ctrl_line.addWidget(QLabel("Overview chart:"))
         self.overview_chart_select = QComboBox()
         self.overview_chart_select.addItems(['bar', 'pie', 'line', 'hist'])
+        self.overview_chart_select.currentTextChanged.connect(lambda _: self._overview_timer.start())
         ctrl_line.addWidget(self.overview_chart_select)
         btn_render_overview = QPushButton("Render")
         btn_render_overview.clicked.connect(self.render_overview_chart)
@@ -690,6 +1132,9 @@ class DesktopApp(QWidget):
 
         analysis_tab.setLayout(an_layout)
         tabs.addTab(analysis_tab, "Analysis")
+        # the overview chart is not redrawn while its tab is hidden; catch up on return
+        tabs.currentChanged.connect(lambda _: self._overview_timer.start()
+                                    if tabs.currentWidget() is overview_tab else None)
 
         right_layout.addWidget(tabs)
         splitter = QSplitter(QtCore.Qt.Horizontal)
@@ -725,26 +1170,29 @@ class DesktopApp(QWidget):
 
     def log(self, msg: str, level: str = "info"):
         """
-        Append colored, timestamped messages to the status box.
+        Queue a colored, timestamped message for the status box; queued lines are
+        written together shortly after. Safe to call from worker threads.
         level: "info"|"warn"|"error"|"success"
         """
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        color = "#000"
-        if level == "error":
-            color = "#b00"
-        elif level == "warn":
-            color = "#b65a00"
-        elif level == "success":
-            color = "#080"
-        else:
-            color = "#000"
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._log_queue.append((level, f"[{ts}] {msg}"))
         try:
-            self.status_box.append(f"<span style='color:{color}'>[{ts}] {msg}</span>")
-        except Exception:
-            try:
-                self.status_box.append(f"[{ts}] {msg}")
-            except Exception:
-                pass
+            self._log_posted.emit()
+        except RuntimeError:
+            pass  # window already destroyed
+
+    def _flush_log(self):
+        box = self.status_box
+        cursor = QtGui.QTextCursor(box.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.beginEditBlock()
+        while self._log_queue:
+            level, line = self._log_queue.popleft()
+            if not box.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertText(line, self._log_formats.get(level, self._log_formats['info']))
+        cursor.endEditBlock()
+        box.verticalScrollBar().setValue(box.verticalScrollBar().maximum())
 
     def toggle_preview(self):
         if self.btn_toggle_preview.isChecked():
@@ -754,12 +1202,79 @@ class DesktopApp(QWidget):
             self.preview_table.show()
             self.btn_toggle_preview.setText("Hide Preview")
 
+    # ---------- background work (network calls, PDF builds) ----------
+    def run_in_background(self, fn, on_done, on_error, busy_widget=None):
+        """
+        Run the blocking call ``fn`` on the Qt thread pool and hand its result to
+        ``on_done`` (or the exception to ``on_error``) back on the GUI thread.
+        ``busy_widget`` is disabled while the call is in flight.
+        """
+        worker = NetWorker(fn)
+        self._net_workers.add(worker)
+        if busy_widget is not None:
+            busy_widget.setEnabled(False)
+        self.busy_label.show()
+
+        def settle():
+            self._net_workers.discard(worker)
+            if busy_widget is not None:
+                # upload/refresh stay disabled if the user logged out meanwhile
+                needs_login = busy_widget in (self.btn_upload, self.btn_refresh)
+                busy_widget.setEnabled(bool(self.access_token) or not needs_login)
+            if not self._net_workers:
+                self.busy_label.hide()
+
+        worker.signals.finished.connect(lambda result: (settle(), on_done(result)))
+        worker.signals.error.connect(lambda exc: (settle(), on_error(exc)))
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    # ---------- dataset state ----------
+    @property
+    def current_preview(self):
+        return self._preview
+
+    @current_preview.setter
+    def current_preview(self, rows):
+        # normalized once here (always a list of row dicts), so the table and
+        # PDF code can use it without type checks
+        self._preview = [r for r in rows if isinstance(r, dict)] if isinstance(rows, list) else []
+
+    # ---------- API endpoints ----------
+    @property
+    def api_base(self):
+        return self._base
+
+    @api_base.setter
+    def api_base(self, base):
+        # endpoint URLs are built once per base change instead of on every request
+        self._base = (base or '').strip().rstrip('/')
+        self._urls = {
+            'token': f"{self._base}/api/token/",
+            'refresh': f"{self._base}/api/token/refresh/",
+            'upload': f"{self._base}/api/upload/",
+            'history': f"{self._base}/api/history/",
+            'summary': f"{self._base}/api/summary/{{pk}}/",
+            'report': f"{self._base}/api/report/{{pk}}/",
+        }
+        self._summary_cache.clear()  # cached summaries belong to the old server
+
     # ---------- AUTH helpers (JWT) ----------
-    def headers(self):
-        h = {}
-        if getattr(self, "access_token", None):
-            h['Authorization'] = f"Bearer {self.access_token}"
-        return h
+    # the tokens live on the session, which sends and refreshes them (see AuthSession)
+    @property
+    def access_token(self):
+        return self.session.access_token
+
+    @access_token.setter
+    def access_token(self, token):
+        self.session.access_token = token
+
+    @property
+    def refresh_token(self):
+        return self.session.refresh_token
+
+    @refresh_token.setter
+    def refresh_token(self, token):
+        self.session.refresh_token = token
 
     def show_login_dialog(self):
         dlg = LoginDialog(self)
@@ -784,11 +1299,13 @@ class DesktopApp(QWidget):
         POST to /api/token/ to obtain access & refresh tokens.
         Stores them in self.access_token & self.refresh_token.
         """
-        url = f"{self.api_base.rstrip('/')}/api/token/"
+        url = self._urls['token']
         try:
-            r = requests.post(url, json={"username": username, "password": password}, timeout=12)
+            r = self.session.post(url, json={"username": username, "password": password},
+                                  headers={'Authorization': None}, timeout=(CONNECT_TIMEOUT, 12))
             if r.status_code == 200:
-                data = r.json()
+                data = response_json(r)
+                self.session.refresh_url = self._urls['refresh']
                 self.access_token = data.get("access")
                 self.refresh_token = data.get("refresh")
                 self.logged_in_username = username
@@ -826,11 +1343,12 @@ class DesktopApp(QWidget):
         """
         if not getattr(self, "refresh_token", None):
             return False
-        url = f"{self.api_base.rstrip('/')}/api/token/refresh/"
+        self.session.refresh_url = self._urls['refresh']
         try:
-            r = requests.post(url, json={"refresh": self.refresh_token}, timeout=12)
+            r = self.session.refresh_access_token()
+            if r is None:
+                return False
             if r.status_code == 200:
-                self.access_token = r.json().get("access")
                 self.log("Refreshed access token.", level="info")
                 return True
             else:
@@ -847,6 +1365,7 @@ class DesktopApp(QWidget):
         self.access_token = None
         self.refresh_token = None
         self.logged_in_username = None
+        self._summary_cache.clear()
         self.btn_upload.setEnabled(False)
         self.btn_refresh.setEnabled(False)
         self.btn_logout.setEnabled(False)
@@ -863,117 +1382,190 @@ class DesktopApp(QWidget):
         if not path:
             return
         self.log(f"Uploading: {path}", level="info")
-        url = f"{self.api_base.rstrip('/')}/api/upload/"
-        QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-        try:
+        url = self._urls['upload']
+
+        def send():
             with open(path, 'rb') as fh:
-                files = {'file': (path.split('/')[-1], fh, 'text/csv')}
-                r = requests.post(url, files=files, headers=self.headers(), timeout=60)
+                body = MultipartFileBody('file', os.path.basename(path), fh, 'text/csv')
+                return self.session.post(url, data=body, headers={'Content-Type': body.content_type},
+                                         timeout=(CONNECT_TIMEOUT, 60))
+
+        def done(r):
             if r.status_code in (200, 201):
-                data = r.json()
+                data = response_json(r)
                 self.current_summary = data.get('summary')
                 self.current_dataset_id = data.get('id') or (data.get('object') or {}).get('id')
                 self.current_preview = data.get('preview_rows', [])
                 self.log("Upload successful.", level="success")
+                self._summary_cache.clear()
                 self.update_ui_from_summary()
                 self.load_history()
             else:
                 self.log(f"Upload failed: {r.status_code} {r.text}", level="error")
                 QMessageBox.critical(self, "Upload failed", f"{r.status_code}: {r.text}")
-        except requests.exceptions.RequestException as e:
+
+        def failed(e):
             self.log(f"Upload exception: {e}", level="error")
             QMessageBox.critical(self, "Upload error", str(e))
-        finally:
-            QApplication.restoreOverrideCursor()
+
+        self.run_in_background(send, done, failed, busy_widget=self.btn_upload)
 
     def load_history(self):
-        url = f"{self.api_base.rstrip('/')}/api/history/"
-        QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-        try:
-            r = requests.get(url, headers=self.headers(), timeout=12)
+        url = self._urls['history']
+
+        def done(r):
             if r.status_code == 200:
-                self.history_list.clear()
-                items = r.json()
-                for it in items:
-                    pk = it.get('id')
-                    name = it.get('original_filename') or ''
-                    label = f"{pk} — {name}"
-                    lw = QtWidgets.QListWidgetItem(label)
-                    lw.setData(QtCore.Qt.UserRole, pk)
-                    self.history_list.addItem(lw)
+                items = response_json(r)
+                # refill with repaints and signals off: one repaint for the whole list
+                self.history_list.setUpdatesEnabled(False)
+                self.history_list.blockSignals(True)
+                try:
+                    self.history_list.clear()
+                    for it in items:
+                        pk = it.get('id')
+                        name = it.get('original_filename') or ''
+                        label = f"{pk} — {name}"
+                        lw = QtWidgets.QListWidgetItem(label)
+                        lw.setData(QtCore.Qt.UserRole, pk)
+                        self.history_list.addItem(lw)
+                finally:
+                    self.history_list.blockSignals(False)
+                    self.history_list.setUpdatesEnabled(True)
                 self.log("History loaded.", level="info")
+                self.prefetch_summaries([it.get('id') for it in items[:PREFETCH_SUMMARIES]])
             elif r.status_code == 401:
                 self.log("History: unauthorized (401). Use Login to obtain JWT.", level="warn")
             else:
                 self.log(f"Failed to load history: {r.status_code} {r.text}", level="error")
-        except requests.exceptions.RequestException as e:
+
+        def failed(e):
             self.log(f"History exception: {e}", level="error")
-        finally:
-            QApplication.restoreOverrideCursor()
+
+        self.run_in_background(lambda: self.session.get(url, timeout=(CONNECT_TIMEOUT, 12)),
+                               done, failed,
+                               busy_widget=self.btn_refresh)
+
+    def _cache_summary(self, pk, obj):
+        self._summary_cache[pk] = obj
+        self._summary_cache.move_to_end(pk)
+        while len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+            self._summary_cache.popitem(last=False)
+
+    def prefetch_summaries(self, pks):
+        """
+        Fetch the summaries of ``pks`` (skipping cached ones) on the thread pool and
+        cache them. Failures are ignored: a missed prefetch just means a normal load.
+        """
+        pks = [pk for pk in pks if pk is not None and pk not in self._summary_cache]
+        if not pks or self._prefetch_worker is not None:
+            return
+        base = self._base
+        urls = {pk: self._urls['summary'].format(pk=pk) for pk in pks}
+
+        def fetch():
+            fetched = {}
+            for pk, url in urls.items():
+                try:
+                    r = self.session.get(url, timeout=(CONNECT_TIMEOUT, 5))
+                except requests.exceptions.RequestException:
+                    break  # server unreachable; don't wait out the rest
+                if r.status_code == 200:
+                    fetched[pk] = response_json(r)
+            return fetched
+
+        def settle(fetched):
+            self._prefetch_worker = None
+            # the user may have logged out or switched servers meanwhile
+            if self.access_token and self._base == base:
+                for pk, obj in fetched.items():
+                    if pk not in self._summary_cache:
+                        self._cache_summary(pk, obj)
+
+        # results are stored from the GUI thread (finished slot), so the cache needs no lock
+        worker = NetWorker(fetch)
+        worker.signals.finished.connect(settle)
+        worker.signals.error.connect(lambda e: settle({}))
+        self._prefetch_worker = worker
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _show_summary_response(self, pk, obj):
+        if isinstance(obj, dict) and 'summary' in obj:
+            self.current_summary = obj.get('summary')
+            self.current_preview = obj.get('preview_rows', [])
+        else:
+            self.current_summary = obj
+            self.current_preview = []
+        self.current_dataset_id = pk
+        self.update_ui_from_summary()
 
     def load_history_item(self, item):
         pk = item.data(QtCore.Qt.UserRole)
         self.log(f"Loading dataset {pk}", level="info")
-        url = f"{self.api_base.rstrip('/')}/api/summary/{pk}/"
-        QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-        try:
-            r = requests.get(url, headers=self.headers(), timeout=12)
+        if pk in self._summary_cache:
+            self._summary_cache.move_to_end(pk)
+            self._show_summary_response(pk, self._summary_cache[pk])
+            return
+        url = self._urls['summary'].format(pk=pk)
+
+        def done(r):
             if r.status_code == 200:
-                obj = r.json()
-                if isinstance(obj, dict) and 'summary' in obj:
-                    self.current_summary = obj.get('summary')
-                    self.current_preview = obj.get('preview_rows', [])
-                else:
-                    self.current_summary = obj
-                    self.current_preview = []
-                self.current_dataset_id = pk
-                self.update_ui_from_summary()
+                obj = response_json(r)
+                self._cache_summary(pk, obj)
+                self._show_summary_response(pk, obj)
             elif r.status_code == 401:
                 self.log("Unauthorized loading summary — token may be missing or expired. Try Login/Refresh.", level="warn")
                 QMessageBox.warning(self, "Unauthorized", "Token missing or expired. Please login again.")
             else:
                 self.log(f"Failed to load summary: {r.status_code} {r.text}", level="error")
                 QMessageBox.critical(self, "Load failed", f"{r.status_code}: {r.text}")
-        except requests.exceptions.RequestException as e:
+
+        def failed(e):
             self.log(f"Load exception: {e}", level="error")
-        finally:
-            QApplication.restoreOverrideCursor()
+
+        self.run_in_background(lambda: self.session.get(url, timeout=(CONNECT_TIMEOUT, 12)),
+                               done, failed,
+                               busy_widget=self.history_list)
 
     # ---------- UI / update ----------
     def update_ui_from_summary(self):
+        """Schedule a refresh of the overview/analysis widgets from current_summary (debounced)."""
+        self._redraw_timer.start()
+
+    def _do_redraw(self):
         s = self.current_summary or {}
-        for i in reversed(range(self.kpi_row.count())):
-            w = self.kpi_row.takeAt(i).widget()
-            if w:
-                w.setParent(None)
 
-        def kpi_widget(title, value, subtitle=None):
+        def kpi_widget(key, title, subtitle=None):
             frame = QFrame()
             frame.setFrameShape(QFrame.StyledPanel)
             frame.setStyleSheet("background:#f5f7fa; border-radius:6px; padding:8px;")
             v = QVBoxLayout()
             v.addWidget(QLabel(f"<b>{title}</b>"))
-            v.addWidget(QLabel(f"<h2 style='margin:0'>{value}</h2>"))
+            self.kpi_values[key] = QLabel()
+            v.addWidget(self.kpi_values[key])
             if subtitle:
                 v.addWidget(QLabel(f"<small>{subtitle}</small>"))
             frame.setLayout(v)
             return frame
 
+        # the KPI boxes are built once; later summaries only update their values
+        if not self.kpi_values:
+            self.kpi_row.addWidget(kpi_widget('total', "Total equipment"))
+            self.kpi_row.addWidget(kpi_widget('avg_flow', "Avg Flowrate"))
+            self.kpi_row.addWidget(kpi_widget('ntypes', "Equipment types"))
+
         total = s.get('total_count', 'N/A')
         avg_flow = s.get('averages', {}).get('Flowrate')
         avg_flow_display = f"{avg_flow:.2f}" if avg_flow is not None else "N/A"
         ntypes = len(s.get('type_distribution', {}) or {})
-        self.kpi_row.addWidget(kpi_widget("Total equipment", total))
-        self.kpi_row.addWidget(kpi_widget("Avg Flowrate", avg_flow_display))
-        self.kpi_row.addWidget(kpi_widget("Equipment types", ntypes))
+        for key, value in (('total', total), ('avg_flow', avg_flow_display), ('ntypes', ntypes)):
+            self.kpi_values[key].setText(f"<h2 style='margin:0'>{value}</h2>")
 
-        summary_html = f"<b>Total:</b> {total}<br><b>Averages:</b><br>"
-        for k,v in (s.get('averages') or {}).items():
-            summary_html += f"{k}: {('N/A' if v is None else f'{v:.2f}')}<br>"
-        self.summary_label.setText(summary_html)
+        lines = [f"<b>Total:</b> {total}", "<b>Averages:</b>"]
+        lines += [f"{k}: {('N/A' if v is None else f'{v:.2f}')}" for k, v in (s.get('averages') or {}).items()]
+        self.summary_label.setText("".join(f"{line}<br>" for line in lines))
 
-        if self.current_preview and isinstance(self.current_preview, list) and len(self.current_preview) > 0:
-            df = pd.DataFrame(self.current_preview)
+        if self.current_preview:
+            df = _pandas().DataFrame(self.current_preview)
             self.populate_table(df, self.preview_table)
         else:
             self.preview_table.setRowCount(0)
@@ -982,31 +1574,50 @@ class DesktopApp(QWidget):
         self.render_overview_chart()
         self.build_analysis_cards()
 
-    def populate_table(self, df: pd.DataFrame, table_widget: QTableWidget):
+    def populate_table(self, df: "pd.DataFrame", table_widget: QTableWidget):
         df.columns = [str(c) for c in df.columns]
-        table_widget.setColumnCount(len(df.columns))
-        table_widget.setRowCount(len(df.index))
-        table_widget.setHorizontalHeaderLabels(df.columns.tolist())
-        for r_idx, row in df.iterrows():
-            for c_idx, col in enumerate(df.columns):
-                val = row[col]
-                item = QTableWidgetItem("" if pd.isna(val) else str(val))
-                table_widget.setItem(r_idx, c_idx, item)
-        table_widget.resizeColumnsToContents()
+        # size the table once and fill it with repaints/signals off, so Qt
+        # repaints once at the end instead of once per inserted item
+        sorting = table_widget.isSortingEnabled()
+        table_widget.setSortingEnabled(False)
+        table_widget.setUpdatesEnabled(False)
+        table_widget.blockSignals(True)
+        try:
+            table_widget.setColumnCount(len(df.columns))
+            table_widget.setRowCount(len(df.index))
+            table_widget.setHorizontalHeaderLabels(df.columns.tolist())
+            # format a whole column at a time (missing -> ""), then only the
+            # QTableWidgetItem creation is left per cell
+            for c_idx in range(len(df.columns)):
+                col = df.iloc[:, c_idx]
+                texts = np.where(col.isna().to_numpy(), "", col.astype(str).to_numpy())
+                for r_idx, text in enumerate(texts.tolist()):
+                    table_widget.setItem(r_idx, c_idx, QTableWidgetItem(text))
+            table_widget.resizeColumnsToContents()
+        finally:
+            table_widget.blockSignals(False)
+            table_widget.setUpdatesEnabled(True)
+            table_widget.setSortingEnabled(sorting)
 
     # ---------- Overview ----------
     def render_overview_chart(self):
-        fig = self.overview_canvas.figure
-        fig.clf()
-        use_constrained_layout(fig)
-        ax = fig.add_subplot(111)
-        self.overview_canvas.ax = ax
-
+        if self.tabs.currentWidget() is not self.overview_tab:
+            return  # redrawn by tabs.currentChanged when the Overview tab is shown
         chart_type = self.overview_chart_select.currentText()
         s = self.current_summary or {}
         type_dist = (s.get('type_distribution') or {}) or {}
-        labels = list(type_dist.keys())
-        counts = [type_dist.get(k, 0) for k in labels]
+        # skip the redraw when the chart would come out the same (the hist
+        # variant plots the averages, so they are part of the key too)
+        render_key = (chart_type, tuple(type_dist.items()), tuple((s.get('averages') or {}).items()))
+        if render_key == self._overview_render_key:
+            return
+        self._overview_render_key = render_key
+
+        fig = self.overview_canvas.figure
+        ax = self.overview_canvas.ax
+        reset_axes(ax)
+
+        labels, counts = split_values(type_dist)
         labels_short = [safe_label(l, max_len=18) for l in labels]
 
         if not labels:
@@ -1026,15 +1637,15 @@ class DesktopApp(QWidget):
         try:
             if chart_type == 'bar':
                 if use_hbar:
-                    ax.barh(labels_short, counts)
+                    category_bars(ax, labels_short, counts, horizontal=True)
                     ax.invert_yaxis()
                     _annotate_bars(ax, counts, use_hbar=True)
                 else:
-                    ax.bar(labels_short, counts)
+                    category_bars(ax, labels_short, counts)
                     _annotate_bars(ax, counts, use_hbar=False)
                 ax.set_ylabel('Count')
             elif chart_type == 'pie':
-                if sum(counts) == 0:
+                if counts.sum() == 0:
                     ax.text(0.5, 0.5, 'No data', ha='center', va='center', fontsize=12)
                 else:
                     wedges, texts, autotexts = ax.pie(
@@ -1046,11 +1657,12 @@ class DesktopApp(QWidget):
                 ax.plot(labels_short, counts, marker='o')
                 ax.set_ylabel('Count')
             elif chart_type == 'hist':
-                nums = [v for v in (s.get('averages') or {}).values() if v is not None]
-                if not nums:
+                nums = np.array([v for v in (s.get('averages') or {}).values() if v is not None],
+                                dtype=np.float64)
+                if not nums.size:
                     nums = counts
-                if nums:
-                    ax.hist(nums, bins=min(10, max(1, len(nums))), edgecolor='black')
+                if nums.size:
+                    hist_bars(ax, nums, edgecolor='black')
                     ax.set_xlabel('Value')
                     ax.set_ylabel('Frequency')
                 else:
@@ -1071,39 +1683,41 @@ class DesktopApp(QWidget):
 
     # ---------- Analysis ----------
     def build_analysis_cards(self):
-        for i in reversed(range(self.analysis_grid_layout.count())):
-            widget = self.analysis_grid_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        self.param_cards = {}
+        """
+        Show a card per parameter in analysis_params_order. Existing cards are
+        updated in place (their canvases are expensive to build); only missing
+        ones are created and cards no longer listed are dropped.
+        """
         per_type = (self.current_summary or {}).get('per_type_averages', {}) or {}
-        r = 0
+        old_cards = self.param_cards
+        self.param_cards = {}
         for p in self.analysis_params_order:
             vals = per_type.get(p, {}) or {}
-            card = ParameterCard(p, vals, on_remove_callback=self.handle_remove_card, canvas_size=(9.5,3.5))
-            card.show()
+            card = old_cards.pop(p, None)
+            if card is None:
+                card = ParameterCard(p, vals, on_remove_callback=self.handle_remove_card, canvas_size=(9.5,3.5))
+            else:
+                card.set_values(vals)
             self.param_cards[p] = card
-            self.analysis_grid_layout.addWidget(card, r, 0)
-            r += 1
+        for card in old_cards.values():
+            card.setParent(None)
+        self._place_analysis_cards()
 
     def rebuild_analysis_grid(self):
         if not self.param_cards:
             self.build_analysis_cards()
             return
-        vals_snapshot = {p: (card.values if card else {}) for p, card in self.param_cards.items()}
-        self.analysis_params_order = list(vals_snapshot.keys())
-        for i in reversed(range(self.analysis_grid_layout.count())):
-            widget = self.analysis_grid_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        r = 0
-        for p, vals in vals_snapshot.items():
-            card = ParameterCard(p, vals, on_remove_callback=self.handle_remove_card, canvas_size=(9.5,3.5))
-            card.show()
-            self.param_cards[p] = card
+        self.analysis_params_order = list(self.param_cards.keys())
+        self._place_analysis_cards()
+
+    def _place_analysis_cards(self):
+        # re-lay out the existing card widgets in analysis_params_order
+        for card in self.param_cards.values():
+            self.analysis_grid_layout.removeWidget(card)
+        for r, p in enumerate(self.analysis_params_order):
+            card = self.param_cards[p]
             self.analysis_grid_layout.addWidget(card, r, 0)
-            r += 1
+            card.show()
 
     def handle_remove_card(self, param_name):
         if param_name in self.param_cards:
@@ -1133,26 +1747,70 @@ class DesktopApp(QWidget):
         # server-saved PDF
         if use_saved and self.current_dataset_id:
             type_chart_type = 'bar'
-            url = f"{self.api_base.rstrip('/')}/api/report/{self.current_dataset_id}/?chart_type={type_chart_type}"
-            QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-            try:
-                r = requests.get(url, headers=self.headers(), stream=True, timeout=30)
-                if r.status_code == 200:
-                    path, _ = QFileDialog.getSaveFileName(self, "Save PDF", f"report_dataset_{self.current_dataset_id}.pdf", "PDF Files (*.pdf)")
-                    if path:
-                        with open(path, 'wb') as fh:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                fh.write(chunk)
-                        QMessageBox.information(self, "Saved", f"Saved PDF to {path}")
-                        self.log(f"Saved server PDF to {path}", level="success")
+            url = self._urls['report'].format(pk=self.current_dataset_id) + f"?chart_type={type_chart_type}"
+            # the file is streamed to disk by the worker, so ask for the target first
+            path, _ = QFileDialog.getSaveFileName(self, "Save PDF", f"report_dataset_{self.current_dataset_id}.pdf", "PDF Files (*.pdf)")
+            if not path:
+                return
+
+            # revalidate against our private copy of the last download of this report
+            # (never the user's saved file, which may since have been overwritten or
+            # edited); on 304 that copy is reused
+            headers = {}
+            etag, last_modified, cached_path = self._saved_reports.get(url, (None, None, None))
+            if cached_path and os.path.exists(cached_path):
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+            cache_dir = self._report_cache_dir
+
+            def download():
+                # closing the streamed response hands its connection back to the session
+                with self.session.get(url, stream=True, headers=headers, timeout=(CONNECT_TIMEOUT, 30)) as r:
+                    if r.status_code == 304:
+                        shutil.copyfile(cached_path, path)
+                        return r.status_code, None
+                    if r.status_code != 200:
+                        return r.status_code, r.text
+                    with open(path, 'wb') as fh:
+                        for chunk in r.iter_content(chunk_size=1 << 20):
+                            fh.write(chunk)
+                    new_etag, new_modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+                if not (new_etag or new_modified):
+                    return 200, None
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    key = hashlib.sha1(f"{url}\n{new_etag}\n{new_modified}".encode('utf-8')).hexdigest()
+                    copy = os.path.join(cache_dir, f"{key}.pdf")
+                    shutil.copyfile(path, copy)
+                except OSError:
+                    return 200, None  # no private copy -> next download is unconditional
+                return 200, (new_etag, new_modified, copy)
+
+            def done(result):
+                status, detail = result
+                if status == 200:
+                    old_copy = self._saved_reports.pop(url, (None, None, None))[2]
+                    if detail:
+                        self._saved_reports[url] = detail
+                    if old_copy and (not detail or old_copy != detail[2]):
+                        try:
+                            os.remove(old_copy)
+                        except OSError:
+                            pass
+                if status in (200, 304):
+                    QMessageBox.information(self, "Saved", f"Saved PDF to {path}")
+                    self.log(f"Saved server PDF to {path}", level="success")
                 else:
-                    QMessageBox.critical(self, "Failed", f"{r.status_code}: {r.text}")
-                    self.log(f"Failed to download server PDF: {r.status_code}", level="error")
-            except requests.exceptions.RequestException as e:
+                    QMessageBox.critical(self, "Failed", f"{status}: {detail}")
+                    self.log(f"Failed to download server PDF: {status}", level="error")
+
+            def failed(e):
                 QMessageBox.critical(self, "Error", str(e))
                 self.log(f"Server PDF request error: {e}", level="error")
-            finally:
-                QApplication.restoreOverrideCursor()
+
+            self.run_in_background(download, done, failed, busy_widget=self.btn_download_pdf)
             return
 
         # Local PDF generation using Platypus
@@ -1168,31 +1826,39 @@ class DesktopApp(QWidget):
             except Exception:
                 analysis_chart_types[pname] = 'bar'
 
-        QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-        try:
-            generate_nice_pdf(
-                path=path,
-                summary=self.current_summary or {},
-                preview_rows=self.current_preview or [],
-                dataset_id=self.current_dataset_id,
-                include_summary=include_summary,
-                include_type_chart=include_type_chart,
-                include_analysis=include_analysis,
-                include_preview=include_preview,
-                analysis_params_order=self.analysis_params_order,
-                create_plot_image_fn=create_plot_image,
-                overview_chart_choice=self.overview_chart_select.currentText(),
-                analysis_chart_types=analysis_chart_types,
-                logger_fn=self.log
-            )
+        # everything the worker needs is read from the widgets here, on the GUI
+        # thread; the build itself only touches ReportLab/Agg and log()
+        pdf_kwargs = dict(
+            path=path,
+            summary=dict(self.current_summary or {}),
+            preview_rows=list(self.current_preview),
+            dataset_id=self.current_dataset_id,
+            include_summary=include_summary,
+            include_type_chart=include_type_chart,
+            include_analysis=include_analysis,
+            include_preview=include_preview,
+            analysis_params_order=list(self.analysis_params_order),
+            create_plot_image_fn=create_plot_image,
+            overview_chart_choice=self.overview_chart_select.currentText(),
+            analysis_chart_types=analysis_chart_types,
+            logger_fn=self.log
+        )
+
+        def done(_):
             QMessageBox.information(self, "Saved", f"Saved PDF to {path}")
             self.log(f"Saved local PDF to {path}", level="success")
-        except Exception as e:
+
+        def failed(e):
             QMessageBox.critical(self, "Error", f"Failed to generate PDF: {e}")
             self.log("PDF error: " + str(e), level="error")
-            self.log(traceback.format_exc(), level="error")
-        finally:
-            QApplication.restoreOverrideCursor()
+            self.log("".join(traceback.format_exception(type(e), e, e.__traceback__)), level="error")
+
+        self.run_in_background(lambda: generate_nice_pdf(**pdf_kwargs), done, failed,
+                               busy_widget=self.btn_download_pdf)
+
+    def closeEvent(self, event):
+        self.session.close()
+        super().closeEvent(event)
 
 # ---------- main ----------
 def main():
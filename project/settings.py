@@ -25,6 +25,10 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background-generated PDF reports. Kept outside MEDIA_ROOT so they are never
+# served publicly; owners download them via /api/report-status/<job_id>/?download=1
+REPORT_FILES_ROOT = BASE_DIR / 'private' / 'reports'
+
 # CORS — prefer explicit origins for dev testing on phone.
 # If you want to allow everything during quick debugging set CORS_ALLOW_ALL_ORIGINS = True
 # but it's safer to list the React dev server origins you use.
@@ -66,6 +70,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -96,6 +101,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # wait for a competing writer instead of failing with "database is locked"
+        # (journal mode and cache are set per connection in api.apps)
+        'OPTIONS': {'timeout': 20},
     }
 }
 